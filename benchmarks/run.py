@@ -0,0 +1,378 @@
+"""Benchmarks for end-to-end control operations against simulated devices.
+
+Each scenario drives the same Moondrop calls the GUI handlers make, against
+SimulatedDawnPro units with fixed latency and no jitter, and reports wall
+time percentiles and USB transfers per operation. Run from the repository
+root:
+
+    python benchmarks/run.py [--gap 0.1] [--iterations 10] [--output results.json]
+    python benchmarks/run.py --compare results.json
+
+A session recorded with DAWNPRO_CAPTURE (see device/capture.py) can be
+re-run as a scenario of its own. Every captured transfer is sent through
+Moondrop again, against a device that answers with the recorded replies and
+latencies, so only this tree's transport overhead (pacing, locking) varies:
+
+    python benchmarks/run.py --replay session.jsonl --output baseline.json
+    python benchmarks/run.py --replay session.jsonl --compare baseline.json
+
+Results are written as JSON so runs can be compared for regressions.
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from device.capture import CapturedTransfer, ReplayDevice, read_capture  # noqa: E402
+from device.coalesce import CoalescingChannel  # noqa: E402
+from device.connection import LIBUSB_ERROR_NO_DEVICE  # noqa: E402
+from device.config import AppConfig  # noqa: E402
+from device.group import DeviceGroup  # noqa: E402
+from device.moondrop import Moondrop  # noqa: E402
+from device.simulator import SimulatedDawnPro  # noqa: E402
+from device.worker import DeviceWorker  # noqa: E402
+
+DEFAULT_SETTINGS = {
+    'volume': 50,
+    'gain': 'Low',
+    'filter_type': 'Fast Roll-Off Low Latency',
+    'led_status': 'On'
+}
+ALTERNATE_SETTINGS = {
+    'volume': 20,
+    'gain': 'High',
+    'filter_type': 'Non-Oversampling',
+    'led_status': 'Off'
+}
+
+
+class Bench:
+    """Simulated devices and the Moondrop instances driving them."""
+
+    def __init__(self, config: AppConfig, devices: int, latency: float) -> None:
+        self.config = config
+        self.simulated = [
+            SimulatedDawnPro(config, index=index, latency=latency, seed=index)
+            for index in range(devices)
+        ]
+        self.moondrops = [
+            Moondrop(config, usb_device=simulated, identifier=simulated.serial_number)
+            for simulated in self.simulated
+        ]
+
+    @property
+    def moondrop(self) -> Moondrop:
+        return self.moondrops[0]
+
+    def transfers(self) -> int:
+        return sum(simulated.transfers for simulated in self.simulated)
+
+    def close(self) -> None:
+        for moondrop in self.moondrops:
+            moondrop.close()
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Get a percentile using linear interpolation between samples."""
+    ordered = sorted(samples)
+    if len(ordered) == 1:
+        return ordered[0]
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def measure(
+    bench: Bench,
+    operation: Callable[[int], Any],
+    iterations: int,
+    setup: Optional[Callable[[int], None]] = None
+) -> Dict[str, Any]:
+    """Time an operation and count the transfers it causes.
+
+    Args:
+        bench: The simulated devices.
+        operation: Called with the iteration number.
+        iterations: Number of timed runs.
+        setup: Untimed preparation before each run.
+
+    Returns:
+        Wall time statistics in milliseconds and transfers per operation.
+    """
+    times: List[float] = []
+    transfers: List[int] = []
+    for iteration in range(iterations):
+        if setup is not None:
+            setup(iteration)
+        before = bench.transfers()
+        started = time.perf_counter()
+        operation(iteration)
+        times.append((time.perf_counter() - started) * 1000)
+        transfers.append(bench.transfers() - before)
+    return {
+        'iterations': iterations,
+        'mean_ms': statistics.mean(times),
+        'p50_ms': percentile(times, 0.50),
+        'p99_ms': percentile(times, 0.99),
+        'min_ms': min(times),
+        'max_ms': max(times),
+        'transfers_per_op': statistics.mean(transfers)
+    }
+
+
+def forget_state(bench: Bench) -> None:
+    """Drop cached device state, as on a fresh application start."""
+    for moondrop in bench.moondrops:
+        moondrop.invalidate_state()
+        moondrop.known_state.invalidate()
+
+
+def scenario_full_refresh(bench: Bench, iterations: int) -> Dict[str, Any]:
+    """Refresh button: one full state read."""
+    return measure(bench, lambda _: bench.moondrop.get_state(max_age=0), iterations)
+
+
+def scenario_startup_restore(bench: Bench, iterations: int) -> Dict[str, Any]:
+    """apply_saved_settings on a fresh start, with the device holding other values."""
+    def setup(_: int) -> None:
+        bench.moondrop.apply(ALTERNATE_SETTINGS, force=True)
+        forget_state(bench)
+
+    return measure(bench, lambda _: bench.moondrop.apply(DEFAULT_SETTINGS), iterations, setup)
+
+
+def scenario_volume_sweep(bench: Bench, iterations: int, step_interval: float) -> Dict[str, Any]:
+    """Slider drag from 0 to 60 through the coalescing channel and device worker."""
+    worker = DeviceWorker()
+    worker.start()
+    channel = CoalescingChannel(
+        bench.moondrop.set_volume,
+        worker.submit,
+        flush_delay=bench.config.transport.VOLUME_FLUSH_DELAY
+    )
+    mismatches = []
+
+    def setup(_: int) -> None:
+        worker.submit(bench.moondrop.set_volume, 0).result()
+
+    def drag(iteration: int) -> None:
+        for value in range(61):
+            channel.push(value)
+            time.sleep(step_interval)
+        # The trailing flush may still be on its timer; wait for it to land
+        deadline = time.monotonic() + 10.0
+        while bench.moondrop.known_state.get('volume') != 60 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        worker.submit(lambda: None).result()
+        if bench.moondrop.get_current_volume() != 60:
+            mismatches.append(iteration)
+
+    try:
+        result = measure(bench, drag, iterations, setup)
+    finally:
+        worker.stop()
+    result['final_volume_mismatches'] = len(mismatches)
+    result['coalescing'] = channel.stats()
+    return result
+
+
+def scenario_multi_device_apply(bench: Bench, iterations: int) -> Dict[str, Any]:
+    """Same preset applied to every device concurrently."""
+    group = DeviceGroup({moondrop.identifier: moondrop for moondrop in bench.moondrops})
+
+    def setup(_: int) -> None:
+        group.apply(ALTERNATE_SETTINGS, force=True)
+        forget_state(bench)
+
+    result = measure(bench, lambda _: group.apply(DEFAULT_SETTINGS), iterations, setup)
+    result['devices'] = len(bench.moondrops)
+    return result
+
+
+def scenario_replay(
+    config: AppConfig,
+    transfers: List[CapturedTransfer],
+    iterations: int,
+    latency_scale: float
+) -> Dict[str, Any]:
+    """A recorded session, every transfer sent again back to back."""
+    # The capture already holds any retries the session made, and a
+    # recorded unplug ends the replay instead of starting a reconnect
+    replay_config = copy.deepcopy(config)
+    replay_config.transport.RETRY_ATTEMPTS = 0
+    replay_config.transport.BREAKER_THRESHOLD = 0
+    end = next(
+        (position for position, transfer in enumerate(transfers)
+         if transfer.error is not None and transfer.error[0] == LIBUSB_ERROR_NO_DEVICE),
+        len(transfers)
+    )
+    session = transfers[:end]
+
+    times: List[float] = []
+    for _ in range(iterations):
+        device = ReplayDevice(session, latency_scale)
+        moondrop = Moondrop(replay_config, usb_device=device, identifier='replay')
+        moondrop.stop_capture()
+        started = time.perf_counter()
+        for transfer in session:
+            try:
+                moondrop.send_control_transfer(
+                    transfer.request_type, transfer.request, transfer.value, transfer.index,
+                    transfer.length if transfer.is_read else transfer.data
+                )
+            except IOError:
+                pass
+        times.append((time.perf_counter() - started) * 1000)
+        moondrop.close()
+    return {
+        'iterations': iterations,
+        'mean_ms': statistics.mean(times),
+        'p50_ms': percentile(times, 0.50),
+        'p99_ms': percentile(times, 0.99),
+        'min_ms': min(times),
+        'max_ms': max(times),
+        'transfers_per_op': float(len(session)),
+        'recorded_ms': sum(transfer.latency + transfer.wait for transfer in session) * 1000,
+        'truncated': end < len(transfers)
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """List scenarios whose p50 or transfer count regressed against a baseline.
+
+    Args:
+        current: This run's results.
+        baseline: A previous run's results.
+        tolerance: Allowed relative p50 increase, e.g. 0.1 for 10%.
+
+    Returns:
+        Human-readable regression descriptions.
+    """
+    regressions = []
+    for name, result in current['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if previous is None:
+            continue
+        if result['transfers_per_op'] > previous['transfers_per_op']:
+            regressions.append(
+                f"{name}: transfers/op {previous['transfers_per_op']:.1f} -> {result['transfers_per_op']:.1f}"
+            )
+        if result['p50_ms'] > previous['p50_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p50 {previous['p50_ms']:.1f} ms -> {result['p50_ms']:.1f} ms")
+    return regressions
+
+
+def report(name: str, result: Dict[str, Any]) -> None:
+    """Print one scenario's result line."""
+    print(
+        f"{name:>20}: p50 {result['p50_ms']:8.1f} ms  p99 {result['p99_ms']:8.1f} ms  "
+        f"transfers/op {result['transfers_per_op']:5.1f}"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmark suite.
+
+    Args:
+        argv: Command-line arguments, defaults to sys.argv[1:].
+
+    Returns:
+        Process exit status; 1 if a regression was found.
+    """
+    parser = argparse.ArgumentParser(description="DawnPro control benchmarks")
+    parser.add_argument('--iterations', type=int, default=10)
+    parser.add_argument('--gap', type=float, default=AppConfig().transport.MIN_TRANSFER_GAP,
+                        help="Minimum gap between transfers in seconds")
+    parser.add_argument('--latency', type=float, default=0.001,
+                        help="Simulated seconds per transfer")
+    parser.add_argument('--devices', type=int, default=4, help="Devices in the multi-device scenario")
+    parser.add_argument('--step-interval', type=float, default=0.005,
+                        help="Seconds between slider positions in the volume sweep")
+    parser.add_argument('--scenario', action='append', help="Run only this scenario (repeatable)")
+    parser.add_argument('--replay', action='append', default=[],
+                        help="Re-run a captured session (repeatable); only replays run unless --scenario is given")
+    parser.add_argument('--latency-scale', type=float, default=1.0,
+                        help="Factor applied to recorded transfer latencies when replaying")
+    parser.add_argument('--output', help="Write results to this JSON file")
+    parser.add_argument('--compare', help="Baseline JSON file to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help="Allowed relative p50 increase when comparing")
+    args = parser.parse_args(argv)
+
+    config = AppConfig()
+    config.transport.MIN_TRANSFER_GAP = args.gap
+    config.transport.PRESENCE_CHECK_INTERVAL = 0.0
+
+    # Scenario name -> (number of simulated devices, runner)
+    scenarios: Dict[str, Tuple[int, Callable[[Bench], Dict[str, Any]]]] = {
+        'full_refresh': (1, lambda bench: scenario_full_refresh(bench, args.iterations)),
+        'startup_restore': (1, lambda bench: scenario_startup_restore(bench, args.iterations)),
+        'volume_sweep_60': (
+            1, lambda bench: scenario_volume_sweep(bench, args.iterations, args.step_interval)
+        ),
+        'multi_device_apply': (
+            args.devices, lambda bench: scenario_multi_device_apply(bench, args.iterations)
+        )
+    }
+    selected = args.scenario or ([] if args.replay else list(scenarios))
+    unknown = set(selected) - set(scenarios)
+    if unknown:
+        parser.error(f"unknown scenario: {', '.join(sorted(unknown))}")
+
+    results: Dict[str, Any] = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'parameters': {
+            'gap': args.gap,
+            'latency': args.latency,
+            'iterations': args.iterations,
+            'devices': args.devices,
+            'step_interval': args.step_interval,
+            'latency_scale': args.latency_scale
+        },
+        'scenarios': {}
+    }
+    for name in selected:
+        devices, runner = scenarios[name]
+        bench = Bench(config, devices, args.latency)
+        try:
+            result = runner(bench)
+        finally:
+            bench.close()
+        results['scenarios'][name] = result
+        report(name, result)
+    for path in args.replay:
+        header, transfers = read_capture(path)
+        if not transfers:
+            parser.error(f"no transfers in capture: {path}")
+        name = f"replay:{os.path.basename(path)}"
+        result = scenario_replay(config, transfers, args.iterations, args.latency_scale)
+        results['scenarios'][name] = result
+        report(name, result)
+        if result['truncated']:
+            print(f"{'':>20}  stopped at the recorded unplug of {header.get('device')}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
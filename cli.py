@@ -0,0 +1,303 @@
+"""Command-line control for the Moondrop Dawn Pro.
+
+Usage:
+    dawnpro get [volume|gain|filter|led]
+    dawnpro set volume 40 | volume +2 | gain High | filter "Non-Oversampling" | led Off
+    dawnpro apply [--volume N] [--gain G] [--filter F] [--led L]
+    dawnpro preset list | apply NAME [--dry-run] | save NAME [--volume N ...] | delete NAME
+
+Requests go to the daemon when it is running and straight to the device
+otherwise. Only the standard library and device.timeline are imported up
+front; the rest of the device package, and pyusb with it, is loaded only
+for the path actually taken.
+GTK is never imported.
+"""
+import time
+
+_STARTED = time.perf_counter()
+
+import argparse
+import os
+import sys
+from typing import Any, Dict, List, Optional
+from device.timeline import Timeline
+
+# Target from interpreter start to a connected backend, in ms. Device I/O
+# for the command itself is paced by the device and not counted.
+COLD_START_BUDGET_MS = 100.0
+
+FIELDS = {
+    'volume': 'volume',
+    'gain': 'gain',
+    'filter': 'filter_type',
+    'led': 'led_status'
+}
+SETTERS = {
+    'volume': 'set_volume',
+    'gain': 'set_gain',
+    'filter': 'set_filter',
+    'led': 'set_led_status'
+}
+PARAMS = {
+    'volume': 'volume',
+    'gain': 'gain',
+    'filter': 'filter_type',
+    'led': 'status'
+}
+
+
+class DirectBackend:
+    """Runs requests against the device in this process."""
+
+    def __init__(self, config: Any, config_path: Optional[str] = None) -> None:
+        from device.config import DEFAULT_CONFIG_PATH
+        from device.config_store import ConfigStore
+        from device.daemon import DeviceService
+        self.service = DeviceService(config, ConfigStore(config_path or DEFAULT_CONFIG_PATH))
+
+    def call(self, method: str, **params: Any) -> Any:
+        """Call a service method.
+
+        Args:
+            method: The method name.
+            **params: Named method parameters.
+
+        Returns:
+            The method's result.
+        """
+        return getattr(self.service, method)(**params)
+
+
+def load_config(path: Optional[str]) -> Any:
+    """Load the application configuration.
+
+    Args:
+        path: Configuration file path; ~ is expanded. The default path
+            is used when omitted.
+
+    Returns:
+        AppConfig instance with loaded settings.
+    """
+    from device.config import DEFAULT_CONFIG_PATH
+    from device.config_store import ConfigStore
+    return ConfigStore(path or DEFAULT_CONFIG_PATH).load()
+
+
+def connect(config: Any, args: argparse.Namespace, timeline: Timeline) -> Any:
+    """Connect to the daemon, falling back to opening the device directly.
+
+    Args:
+        config: Application configuration instance.
+        args: Parsed command-line arguments.
+        timeline: Timeline to record milestones on.
+
+    Returns:
+        A backend with a call(method, **params) method.
+    """
+    if not args.direct:
+        from device.daemon import DaemonClient, default_socket_path
+        socket_path = args.socket or default_socket_path(config)
+        if os.path.exists(socket_path):
+            client = DaemonClient(socket_path)
+            try:
+                client.connect()
+                timeline.mark('daemon connected')
+                return client
+            except OSError:
+                pass
+    backend = DirectBackend(config, args.config)
+    timeline.mark('device opened')
+    return backend
+
+
+def add_setting_options(parser: argparse.ArgumentParser) -> None:
+    """Add the --volume, --gain, --filter and --led options.
+
+    Args:
+        parser: The subcommand parser.
+    """
+    parser.add_argument('--volume', type=int)
+    parser.add_argument('--gain')
+    parser.add_argument('--filter')
+    parser.add_argument('--led')
+
+
+def setting_options(args: argparse.Namespace) -> Dict[str, Any]:
+    """Get the settings given with --volume, --gain, --filter and --led.
+
+    Args:
+        args: Parsed command-line arguments.
+
+    Returns:
+        Mapping of device field name to value for the options given.
+    """
+    settings = {
+        'volume': args.volume,
+        'gain': args.gain,
+        'filter_type': args.filter,
+        'led_status': args.led
+    }
+    return {name: value for name, value in settings.items() if value is not None}
+
+
+def parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    """Parse command-line arguments.
+
+    Args:
+        argv: Arguments to parse, defaults to sys.argv[1:].
+
+    Returns:
+        The parsed arguments.
+    """
+    # Output options are accepted before or after the subcommand. They are
+    # suppressed by default, so a subcommand that doesn't see them keeps
+    # the value parsed before it
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument('--json', action='store_true', default=argparse.SUPPRESS, help="Print results as JSON")
+    output.add_argument(
+        '--timings', action='store_true', default=argparse.SUPPRESS, help="Print a startup timeline to stderr"
+    )
+
+    parser = argparse.ArgumentParser(
+        prog='dawnpro', description="Control the Moondrop Dawn Pro", parents=[output]
+    )
+    parser.add_argument('--config', help="Configuration file (default ~/.config/dawnpro/config.json)")
+    parser.add_argument('--device', help="Serial number or bus/port path of the device")
+    parser.add_argument('--socket', help="Daemon socket path")
+    parser.add_argument('--direct', action='store_true', help="Don't use the daemon")
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    def add_command(subparsers: Any, name: str, **kwargs: Any) -> argparse.ArgumentParser:
+        return subparsers.add_parser(name, parents=[output], **kwargs)
+
+    get = add_command(commands, 'get', help="Read device settings")
+    get.add_argument('field', nargs='?', choices=sorted(FIELDS), help="Single setting to read")
+
+    set_ = add_command(commands, 'set', help="Change one setting")
+    set_.add_argument('field', choices=sorted(FIELDS))
+    set_.add_argument('value', help="New value; volume also accepts +N/-N")
+    set_.add_argument('--force', action='store_true', help="Write even if unchanged")
+
+    apply = add_command(commands, 'apply', help="Change several settings at once")
+    add_setting_options(apply)
+    apply.add_argument('--force', action='store_true', help="Write even if unchanged")
+
+    preset = add_command(commands, 'preset', help="List, apply, save or delete named presets")
+    actions = preset.add_subparsers(dest='action')
+    actions.required = True
+    add_command(actions, 'list', help="Show every preset")
+    preset_apply = add_command(actions, 'apply', help="Apply a preset, writing only what differs")
+    preset_apply.add_argument('name')
+    preset_apply.add_argument('--force', action='store_true', help="Write every field even if unchanged")
+    preset_apply.add_argument('--dry-run', action='store_true', help="Only show what would be written")
+    preset_save = add_command(actions, 'save', help="Save the given settings, or the device's current ones")
+    preset_save.add_argument('name')
+    add_setting_options(preset_save)
+    preset_delete = add_command(actions, 'delete', help="Remove a preset")
+    preset_delete.add_argument('name')
+
+    args = parser.parse_args(argv)
+    for option in ('json', 'timings'):
+        if not hasattr(args, option):
+            setattr(args, option, False)
+    return args
+
+
+def run_command(backend: Any, args: argparse.Namespace) -> Any:
+    """Execute the requested command.
+
+    Args:
+        backend: The daemon client or direct backend.
+        args: Parsed command-line arguments.
+
+    Returns:
+        The command's result.
+    """
+    device: Dict[str, Any] = {'device': args.device} if args.device else {}
+    if args.command == 'get':
+        if args.field == 'volume':
+            return backend.call('get_volume', **device)
+        state = backend.call('get_state', **device)
+        if state is None or args.field is None:
+            return state
+        return state[FIELDS[args.field]]
+
+    if args.command == 'set':
+        if args.field == 'volume' and args.value[:1] in ('+', '-'):
+            return backend.call('adjust_volume', delta=int(args.value), **device)
+        value: Any = int(args.value) if args.field == 'volume' else args.value
+        return backend.call(
+            SETTERS[args.field], force=args.force, **{PARAMS[args.field]: value}, **device
+        )
+
+    if args.command == 'preset':
+        if args.action == 'list':
+            return backend.call('list_presets')
+        if args.action == 'apply':
+            return backend.call(
+                'apply_preset', name=args.name, force=args.force, dry_run=args.dry_run, **device
+            )
+        if args.action == 'save':
+            settings = setting_options(args) or None
+            return backend.call('save_preset', name=args.name, settings=settings, **device)
+        return backend.call('delete_preset', name=args.name)
+
+    return backend.call('apply', settings=setting_options(args), force=args.force, **device)
+
+
+def print_result(result: Any, as_json: bool) -> None:
+    """Print a command result.
+
+    Args:
+        result: The command's result.
+        as_json: Print JSON instead of plain text.
+    """
+    if as_json:
+        import json
+        print(json.dumps(result))
+    elif isinstance(result, dict):
+        for name, value in result.items():
+            if name != 'timestamp':
+                print(f"{name}: {value}")
+    else:
+        print(result)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the command line interface.
+
+    Args:
+        argv: Command-line arguments, defaults to sys.argv[1:].
+
+    Returns:
+        Process exit status.
+    """
+    timeline = Timeline(_STARTED)
+    args = parse_args(argv)
+    config = load_config(args.config)
+    timeline.mark('config loaded')
+    try:
+        backend = connect(config, args, timeline)
+        result = run_command(backend, args)
+    except Exception as error:
+        # DaemonError, IOError or a missing device all end up here
+        sys.stderr.write(f"dawnpro: {error}\n")
+        return 1
+    timeline.mark('command done')
+
+    print_result(result, args.json)
+    if args.timings:
+        timeline.report(sys.stderr)
+        ready = timeline.elapsed_ms('daemon connected') or timeline.elapsed_ms('device opened')
+        if ready is not None and ready > COLD_START_BUDGET_MS:
+            sys.stderr.write(
+                f"warning: startup took {ready:.1f} ms, "
+                f"over the {COLD_START_BUDGET_MS:.0f} ms cold-start budget\n"
+            )
+    failed = result is None or result is False or (isinstance(result, dict) and result.get('ok') is False)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,246 @@
+import asyncio
+import functools
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Mapping, Optional, Set, TypeVar
+from device.config import AppConfig
+from device.moondrop import Moondrop
+from device.state import ApplyResult, DeviceState
+
+T = TypeVar('T')
+
+
+class AsyncMoondrop:
+    """Awaitable facade over a Moondrop device.
+
+    Each coroutine runs the matching Moondrop method on a single-thread
+    executor, so the event loop never blocks and the results, caches and
+    write elision are exactly those of the synchronous API. The pacing gap
+    before a command is awaited with asyncio.sleep. Commands are
+    serialized, and commands still waiting their turn can be cancelled.
+    """
+
+    def __init__(self, moondrop: Moondrop, executor: Optional[Executor] = None) -> None:
+        """Initialize the facade.
+
+        Args:
+            moondrop: The device to drive.
+            executor: Executor for blocking transfers. A private
+                single-thread executor is created when omitted.
+        """
+        self.moondrop = moondrop
+        self._own_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="dawnpro-async"
+        )
+        self._lock: Optional[asyncio.Lock] = None
+        self._queued: Set['asyncio.Future[Any]'] = set()
+
+    @classmethod
+    async def open(cls, config: AppConfig) -> 'AsyncMoondrop':
+        """Open the device without blocking the event loop.
+
+        Args:
+            config: Application configuration instance.
+
+        Returns:
+            AsyncMoondrop wrapping the opened device.
+
+        Raises:
+            ValueError: If the device is not found.
+        """
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dawnpro-async")
+        loop = asyncio.get_running_loop()
+        moondrop = await loop.run_in_executor(executor, Moondrop, config)
+        instance = cls(moondrop, executor)
+        instance._own_executor = True
+        return instance
+
+    async def close(self) -> None:
+        """Cancel queued commands and release the executor."""
+        self.cancel_pending()
+        if self._own_executor:
+            self._executor.shutdown(wait=False)
+
+    async def __aenter__(self) -> 'AsyncMoondrop':
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    def cancel_pending(self) -> int:
+        """Cancel every command still waiting for its turn.
+
+        The command currently talking to the device is left to finish.
+
+        Returns:
+            The number of commands cancelled.
+        """
+        queued = list(self._queued)
+        for waiter in queued:
+            waiter.cancel()
+        return len(queued)
+
+    async def _serialized(self, operation: Callable[[], Awaitable[T]]) -> T:
+        """Run an operation once every earlier command has finished.
+
+        Cancellation while waiting removes the command from the queue.
+        Once started, the operation runs to completion so a command of
+        several transfers is never cut short; the caller still observes the
+        cancellation.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        waiter = asyncio.ensure_future(self._lock.acquire())
+        self._queued.add(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._lock.release()
+            raise
+        finally:
+            self._queued.discard(waiter)
+
+        try:
+            running = asyncio.ensure_future(operation())
+            try:
+                return await asyncio.shield(running)
+            except asyncio.CancelledError:
+                await asyncio.wait([running])
+                raise
+        finally:
+            self._lock.release()
+
+    async def _run(self, method: Callable[..., T], *args: Any) -> T:
+        """Run a Moondrop method on the executor as one serialized command.
+
+        The pacing gap before the first transfer is awaited on the event
+        loop; later transfers of the same command pace on the executor.
+        """
+        async def operation() -> T:
+            delay = self.moondrop.pacer.delay()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(method, *args))
+
+        return await self._serialized(operation)
+
+    async def refresh_volume(self) -> Optional[Any]:
+        """Refresh the volume settings.
+
+        Returns:
+            The response from the device, or None if failed.
+        """
+        return await self._run(self.moondrop.refresh_volume)
+
+    async def get_state(self, max_age: Optional[float] = None) -> Optional[DeviceState]:
+        """Get a snapshot of every device setting.
+
+        Args:
+            max_age: Maximum age of a cached snapshot in seconds. Defaults
+                to the configured STATE_TTL; 0 always reads the device.
+
+        Returns:
+            The device state snapshot, or None if the read failed.
+        """
+        return await self._run(self.moondrop.get_state, max_age)
+
+    async def get_current_volume(self) -> Optional[int]:
+        """Get the current volume level.
+
+        Returns:
+            The current volume level (0-60) or None if failed.
+        """
+        return await self._run(self.moondrop.get_current_volume)
+
+    async def get_gain(self) -> Optional[str]:
+        """Get the current gain setting.
+
+        Returns:
+            The current gain setting or None if failed.
+        """
+        return await self._run(self.moondrop.get_gain)
+
+    async def get_filter(self) -> Optional[str]:
+        """Get the current filter setting.
+
+        Returns:
+            The current filter setting or None if failed.
+        """
+        return await self._run(self.moondrop.get_filter)
+
+    async def get_current_led_status(self) -> Optional[str]:
+        """Get the current LED status.
+
+        Returns:
+            The current LED status or None if failed.
+        """
+        return await self._run(self.moondrop.get_current_led_status)
+
+    async def set_volume(self, volume: int, force: bool = False) -> bool:
+        """Set the device volume.
+
+        Args:
+            volume: The volume level to set (0-60).
+            force: Send the write even if the device already holds this value.
+
+        Returns:
+            True if successful, False otherwise.
+        """
+        return await self._run(self.moondrop.set_volume, volume, force)
+
+    async def set_gain(self, gain: str, force: bool = False) -> bool:
+        """Set the gain setting.
+
+        Args:
+            gain: The gain setting to set ("Low" or "High").
+            force: Send the write even if the device already holds this value.
+
+        Returns:
+            True if successful, False otherwise.
+        """
+        return await self._run(self.moondrop.set_gain, gain, force)
+
+    async def set_filter(self, filter_type: str, force: bool = False) -> bool:
+        """Set the filter type.
+
+        Args:
+            filter_type: The filter type to set.
+            force: Send the write even if the device already holds this value.
+
+        Returns:
+            True if successful, False otherwise.
+        """
+        return await self._run(self.moondrop.set_filter, filter_type, force)
+
+    async def set_led_status(self, status: str, force: bool = False) -> bool:
+        """Set the LED status.
+
+        Args:
+            status: The LED status to set.
+            force: Send the write even if the device already holds this value.
+
+        Returns:
+            True if successful, False otherwise.
+        """
+        return await self._run(self.moondrop.set_led_status, status, force)
+
+    async def apply(self, settings: Mapping[str, Any], force: bool = False) -> ApplyResult:
+        """Apply several settings as one batch with a single volume refresh.
+
+        The whole batch runs as one serialized command.
+
+        Args:
+            settings: Mapping of "volume", "gain", "filter_type" and/or
+                "led_status" to target values.
+            force: Send every write even if the device already holds the value.
+
+        Returns:
+            ApplyResult with per-field success.
+
+        Raises:
+            ValueError: If settings contains an unknown field or a value
+                that can't be encoded.
+        """
+        return await self._run(self.moondrop.apply, settings, force)
@@ -0,0 +1,54 @@
+import os
+from typing import Any, Callable, List, Optional
+import usb.core
+from device.config import AppConfig
+
+BACKEND_ENV_VAR = 'DAWNPRO_BACKEND'
+USB_BACKEND = 'usb'
+SIMULATED_BACKEND = 'simulated'
+
+
+def backend_name(config: AppConfig) -> str:
+    """Get the device backend in use.
+
+    Args:
+        config: Application configuration instance.
+
+    Returns:
+        The DAWNPRO_BACKEND environment variable if set, otherwise the
+        configured BACKEND ("usb" or "simulated").
+    """
+    return os.environ.get(BACKEND_ENV_VAR) or config.transport.BACKEND
+
+
+def find_devices(
+    config: AppConfig,
+    custom_match: Optional[Callable[[Any], bool]] = None
+) -> List[Any]:
+    """Find every attached Dawn Pro on the selected backend.
+
+    Args:
+        config: Application configuration instance.
+        custom_match: Extra predicate a device must satisfy.
+
+    Returns:
+        The matching pyusb (or simulated) devices.
+
+    Raises:
+        ValueError: If the configured backend is unknown.
+    """
+    backend = backend_name(config)
+    if backend == SIMULATED_BACKEND:
+        from device.simulator import simulated_devices
+        return [
+            device for device in simulated_devices(config)
+            if device.attached and (custom_match is None or custom_match(device))
+        ]
+    if backend != USB_BACKEND:
+        raise ValueError(f"Unknown device backend: {backend}")
+    return list(usb.core.find(
+        find_all=True,
+        idVendor=config.device_identifiers.MOONDROP_VID,
+        idProduct=config.device_identifiers.DAWN_PRO_PID,
+        custom_match=custom_match
+    ))
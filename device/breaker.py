@@ -0,0 +1,110 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+from device.errors import DeviceWedgedError
+
+
+class CircuitBreaker:
+    """Fails transfers fast once the device stops responding.
+
+    After threshold consecutive failed commands (a command that was
+    retried counts once, when its last attempt fails) the breaker opens and
+    check() raises DeviceWedgedError without touching the bus, so commands
+    queued behind a wedged device fail immediately instead of each waiting
+    out its timeout. Once cooldown seconds have passed a single trial
+    transfer is let through: success closes the breaker, failure opens it
+    for another cooldown.
+    """
+
+    def __init__(self, threshold: int, cooldown: float) -> None:
+        """Initialize the breaker.
+
+        Args:
+            threshold: Consecutive failures that open the breaker; 0 disables it.
+            cooldown: Seconds to stay open before a trial transfer.
+        """
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+        self._trips = 0
+        self._rejected = 0
+
+    @property
+    def is_open(self) -> bool:
+        """Whether transfers are currently being rejected."""
+        return self._opened_at is not None
+
+    def check(self) -> None:
+        """Let a transfer through or reject it while open.
+
+        Raises:
+            DeviceWedgedError: If the breaker is open and the cooldown hasn't
+                passed, or another trial transfer is already in flight.
+        """
+        if self._opened_at is None:
+            return
+        with self._lock:
+            if self._opened_at is None:
+                return
+            remaining = self.cooldown - (time.monotonic() - self._opened_at)
+            if remaining <= 0 and not self._trial:
+                self._trial = True
+                return
+            self._rejected += 1
+        raise DeviceWedgedError(
+            f"Device not responding; retrying in {max(remaining, 0.0):.1f} s"
+        )
+
+    def record(self, success: bool) -> None:
+        """Record the outcome of a transfer let through by check().
+
+        Args:
+            success: Whether the transfer succeeded.
+        """
+        if success:
+            if self._failures or self._opened_at is not None:
+                with self._lock:
+                    if self._opened_at is not None:
+                        logging.info("Device responding again; circuit closed.")
+                    self._failures = 0
+                    self._opened_at = None
+                    self._trial = False
+            return
+        if self.threshold <= 0:
+            return
+        with self._lock:
+            self._failures += 1
+            if self._trial or (self._opened_at is None and self._failures >= self.threshold):
+                if self._opened_at is None:
+                    self._trips += 1
+                    logging.warning(
+                        "%d consecutive transfers failed; failing fast for %.1f s.",
+                        self._failures, self.cooldown
+                    )
+                self._opened_at = time.monotonic()
+                self._trial = False
+
+    def reset(self) -> None:
+        """Close the breaker, e.g. after the device was reconnected."""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def stats(self) -> Dict[str, Any]:
+        """Get breaker statistics.
+
+        Returns:
+            Dictionary with the state, consecutive failures, times opened and
+            transfers rejected.
+        """
+        return {
+            'open': self.is_open,
+            'failures': self._failures,
+            'trips': self._trips,
+            'rejected': self._rejected
+        }
@@ -0,0 +1,294 @@
+"""Recording and replay of USB control transfers.
+
+A capture is a JSON-lines file. The first line is a header; every other
+line is one control transfer:
+
+    {"capture": 1, "started": "2024-05-01T12:00:00", "device": "1-2"}
+    {"t": 0.0012, "rt": 67, "r": 160, "v": 0, "i": 2464, "out": "c0a5a3", "n": 3, "ms": 0.41, "wait": 0.0}
+    {"t": 0.1019, "rt": 195, "r": 161, "v": 0, "i": 2464, "len": 7, "in": "c0a5a3000000", "ms": 0.38, "wait": 100.2}
+
+"t" is seconds since the capture started, "ms" the time spent in
+ctrl_transfer and "wait" the milliseconds spent on transfer pacing first.
+Payloads are hex. Failed transfers carry "err": [libusb code, errno,
+message] instead of a result.
+"""
+import array
+import errno
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+import usb.core
+
+CAPTURE_ENV_VAR = 'DAWNPRO_CAPTURE'
+FORMAT_VERSION = 1
+
+# libusb reports an expired transfer timeout as LIBUSB_ERROR_TIMEOUT
+LIBUSB_ERROR_TIMEOUT = -7
+
+
+class TransferRecorder:
+    """Streams control transfers to a capture file.
+
+    The file is line buffered, so a capture survives the application being
+    killed, and each record is a single short write.
+    """
+
+    def __init__(self, path: str, device: Optional[str] = None) -> None:
+        """Open the capture file and write its header.
+
+        Args:
+            path: File to write; ~ is expanded and an existing file is replaced.
+            device: Identifier of the recorded device, stored in the header.
+        """
+        self.path = os.path.expanduser(path)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._file: Any = open(self.path, 'w', buffering=1)
+        self._started = time.perf_counter()
+        self.records = 0
+        header = {
+            'capture': FORMAT_VERSION,
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'device': device
+        }
+        self._file.write(json.dumps(header, separators=(',', ':')) + '\n')
+
+    def record(
+        self,
+        request_type: int,
+        request: int,
+        value: int,
+        index: int,
+        data_or_length: Union[Sequence[int], int],
+        result: Any,
+        elapsed: float,
+        slept: float = 0.0,
+        error: Optional[BaseException] = None
+    ) -> None:
+        """Append one transfer.
+
+        Args:
+            request_type: bmRequestType.
+            request: bRequest.
+            value: wValue.
+            index: wIndex.
+            data_or_length: Data sent for OUT transfers, length for IN.
+            result: Bytes written for OUT transfers, the reply for IN.
+            elapsed: Seconds spent in ctrl_transfer.
+            slept: Seconds spent on transfer pacing beforehand.
+            error: The exception if the transfer failed.
+        """
+        entry: Dict[str, Any] = {
+            't': round(time.perf_counter() - self._started - elapsed, 6),
+            'rt': request_type, 'r': request, 'v': value, 'i': index
+        }
+        if request_type & 0x80:
+            entry['len'] = data_or_length
+            if error is None:
+                entry['in'] = bytes(result).hex()
+        else:
+            entry['out'] = bytes(data_or_length).hex()
+            if error is None:
+                entry['n'] = result
+        entry['ms'] = round(elapsed * 1000, 3)
+        entry['wait'] = round(slept * 1000, 3)
+        if error is not None:
+            entry['err'] = [
+                getattr(error, 'backend_error_code', None),
+                getattr(error, 'errno', None),
+                getattr(error, 'strerror', None) or str(error)
+            ]
+        line = json.dumps(entry, separators=(',', ':')) + '\n'
+        with self._lock:
+            if self._file is not None:
+                self._file.write(line)
+                self.records += 1
+
+    def close(self) -> None:
+        """Close the capture file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class CapturedTransfer(NamedTuple):
+    """One control transfer read from a capture."""
+    time: float
+    request_type: int
+    request: int
+    value: int
+    index: int
+    data: Optional[bytes]
+    length: Optional[int]
+    result: Union[bytes, int, None]
+    latency: float
+    wait: float
+    error: Optional[Tuple[Optional[int], Optional[int], str]]
+
+    @property
+    def is_read(self) -> bool:
+        """Whether this is an IN transfer."""
+        return bool(self.request_type & 0x80)
+
+
+def read_capture(path: str) -> Tuple[Dict[str, Any], List[CapturedTransfer]]:
+    """Load a capture file.
+
+    Args:
+        path: The capture file; ~ is expanded.
+
+    Returns:
+        The header and the transfers in recorded order.
+
+    Raises:
+        ValueError: If the file is not a capture or has an unknown version.
+    """
+    with open(os.path.expanduser(path), 'r') as f:
+        lines = iter(f)
+        try:
+            header = json.loads(next(lines))
+        except StopIteration:
+            raise ValueError(f"Empty capture: {path}")
+        if not isinstance(header, dict) or header.get('capture') != FORMAT_VERSION:
+            raise ValueError(f"Not a version {FORMAT_VERSION} capture: {path}")
+        return header, list(_parse(lines))
+
+
+def _parse(lines: Iterator[str]) -> Iterator[CapturedTransfer]:
+    """Decode the transfer lines of a capture."""
+    for line in lines:
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        is_read = bool(entry['rt'] & 0x80)
+        if is_read:
+            result: Union[bytes, int, None] = bytes.fromhex(entry['in']) if 'in' in entry else None
+        else:
+            result = entry.get('n')
+        error = entry.get('err')
+        yield CapturedTransfer(
+            time=entry['t'],
+            request_type=entry['rt'],
+            request=entry['r'],
+            value=entry['v'],
+            index=entry['i'],
+            data=None if is_read else bytes.fromhex(entry['out']),
+            length=entry['len'] if is_read else None,
+            result=result,
+            latency=entry['ms'] / 1000,
+            wait=entry.get('wait', 0.0) / 1000,
+            error=tuple(error) if error is not None else None
+        )
+
+
+class ReplayMismatchError(AssertionError):
+    """Raised when a replayed transfer differs from the recorded one."""
+
+
+class ReplayDevice:
+    """Stand-in for a pyusb device that plays back a capture.
+
+    Each ctrl_transfer call is answered by the next recorded transfer: it
+    takes the recorded latency (times latency_scale), then returns the
+    recorded reply or raises the recorded error. Requests are checked
+    against the recording so a replay can't silently drift from it.
+    """
+
+    def __init__(
+        self,
+        transfers: Sequence[CapturedTransfer],
+        latency_scale: float = 1.0,
+        strict: bool = True
+    ) -> None:
+        """Initialize the device.
+
+        Args:
+            transfers: The recorded transfers, in order.
+            latency_scale: Factor applied to every recorded latency; 0
+                answers immediately.
+            strict: Raise ReplayMismatchError when a request differs from
+                the recording.
+        """
+        self.transfers = list(transfers)
+        self.latency_scale = latency_scale
+        self.strict = strict
+        self.position = 0
+        self.bus = 0
+        self.address = 1
+        self.port_numbers = (1,)
+        self.iSerialNumber = 0
+
+    @property
+    def remaining(self) -> int:
+        """Number of recorded transfers not yet replayed."""
+        return len(self.transfers) - self.position
+
+    def ctrl_transfer(
+        self,
+        bmRequestType: int,
+        bRequest: int,
+        wValue: int = 0,
+        wIndex: int = 0,
+        data_or_wLength: Union[Sequence[int], int, None] = None,
+        timeout: Optional[int] = None
+    ) -> Union[int, array.array]:
+        """Answer a control transfer from the recording.
+
+        Returns:
+            The recorded bytes written for OUT transfers, reply for IN.
+
+        Raises:
+            usb.core.USBError: If the recorded transfer failed, or the
+                recorded latency exceeds timeout.
+            ReplayMismatchError: If strict and the request differs from the
+                recording, or the recording is exhausted.
+        """
+        if self.position >= len(self.transfers):
+            raise ReplayMismatchError(f"Capture exhausted after {self.position} transfers")
+        recorded = self.transfers[self.position]
+        self.position += 1
+        if self.strict:
+            self._check(recorded, bmRequestType, bRequest, wValue, wIndex, data_or_wLength)
+
+        latency = recorded.latency * self.latency_scale
+        if timeout and latency * 1000 > timeout:
+            time.sleep(timeout / 1000)
+            raise usb.core.USBError("Operation timed out", LIBUSB_ERROR_TIMEOUT, errno.ETIMEDOUT)
+        if latency > 0:
+            time.sleep(latency)
+        if recorded.error is not None:
+            code, errno_value, message = recorded.error
+            raise usb.core.USBError(message, code, errno_value)
+        if recorded.is_read:
+            return array.array('B', recorded.result or b'')
+        return recorded.result if recorded.result is not None else len(recorded.data or b'')
+
+    def _check(
+        self,
+        recorded: CapturedTransfer,
+        request_type: int,
+        request: int,
+        value: int,
+        index: int,
+        data_or_length: Union[Sequence[int], int, None]
+    ) -> None:
+        """Compare a request with the recorded one."""
+        if recorded.is_read:
+            actual: Any = data_or_length
+            expected: Any = recorded.length
+        else:
+            actual = bytes(data_or_length or b'')
+            expected = recorded.data
+        if (request_type, request, value, index, actual) != (
+            recorded.request_type, recorded.request, recorded.value, recorded.index, expected
+        ):
+            raise ReplayMismatchError(
+                f"Transfer {self.position - 1}: expected "
+                f"{(recorded.request_type, recorded.request, recorded.value, recorded.index, expected)}, "
+                f"got {(request_type, request, value, index, actual)}"
+            )
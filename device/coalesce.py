@@ -0,0 +1,106 @@
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class CoalescingChannel:
+    """Sends only the newest of a burst of values.
+
+    Values pushed while a send is pending or in flight replace each other;
+    stale ones are dropped and at most one send is queued at a time. The
+    last value pushed is always the last value sent.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[Any], Any],
+        submit: Callable[[Callable[[], Optional[Tuple[Any, Any]]]], Any],
+        flush_delay: float = 0.0
+    ) -> None:
+        """Initialize the channel.
+
+        Args:
+            send: Performs the actual write for a value.
+            submit: Schedules a zero-argument flush, e.g. on a DeviceWorker.
+                The flush returns (value, send result), or None if there
+                was nothing to send.
+            flush_delay: Seconds to wait after the first push of a burst
+                before flushing, so more values can be coalesced.
+        """
+        self.send = send
+        self.submit = submit
+        self.flush_delay = flush_delay
+        self._lock = threading.Lock()
+        self._pending: Any = None
+        self._has_pending = False
+        self._scheduled = False
+        self._sending = False
+        self._pushed = 0
+        self._sent = 0
+        self._dropped = 0
+
+    def push(self, value: Any) -> None:
+        """Offer a new target value.
+
+        Args:
+            value: The newest value; replaces any value not yet sent.
+        """
+        with self._lock:
+            if self._has_pending:
+                self._dropped += 1
+            self._pending = value
+            self._has_pending = True
+            self._pushed += 1
+            if self._scheduled:
+                return
+            self._scheduled = True
+
+        if self.flush_delay > 0:
+            timer = threading.Timer(self.flush_delay, self.submit, args=(self._flush,))
+            timer.daemon = True
+            timer.start()
+        else:
+            self.submit(self._flush)
+
+    def _flush(self) -> Optional[Tuple[Any, Any]]:
+        """Send the newest pending value, if any.
+
+        Returns:
+            Tuple of (value, send result), or None if nothing was pending.
+        """
+        with self._lock:
+            if not self._has_pending:
+                self._scheduled = False
+                return None
+            value = self._pending
+            self._pending = None
+            self._has_pending = False
+            self._scheduled = False
+            self._sending = True
+            self._sent += 1
+        try:
+            return value, self.send(value)
+        finally:
+            with self._lock:
+                self._sending = False
+
+    def idle(self) -> bool:
+        """Check whether no value is waiting or being sent.
+
+        Returns:
+            True if every pushed value has been sent.
+        """
+        with self._lock:
+            return not (self._has_pending or self._scheduled or self._sending)
+
+    def stats(self) -> Dict[str, int]:
+        """Get coalescing statistics.
+
+        Returns:
+            Dictionary with pushed, sent and dropped value counts.
+        """
+        with self._lock:
+            return {
+                'pushed': self._pushed,
+                'sent': self._sent,
+                'dropped': self._dropped
+            }
@@ -1,9 +1,12 @@
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 import json
 import os
+import tempfile
 from pathlib import Path
 
+DEFAULT_CONFIG_PATH = '~/.config/dawnpro/config.json'
+
 
 @dataclass
 class DeviceConstants:
@@ -28,6 +31,7 @@ class DeviceIdentifiers:
     DAWN_PRO_PID: int = 0xf06a
     VOLUME_MAX: int = 0x00
     VOLUME_MIN: int = 0x70
+    DEVICE_ID: Optional[str] = None
 
 
 @dataclass
@@ -38,6 +42,19 @@ class DefaultSettings:
     DEFAULT_GAIN: str = "Low"
     DEFAULT_FILTER: str = "Fast Roll-Off Low Latency"
 
+    def to_settings(self) -> Dict[str, Any]:
+        """Get the defaults as a settings mapping for Moondrop.apply.
+
+        Returns:
+            Dictionary keyed by device field name.
+        """
+        return {
+            'volume': self.DEFAULT_VOLUME,
+            'gain': self.DEFAULT_GAIN or None,
+            'filter_type': self.DEFAULT_FILTER or None,
+            'led_status': self.DEFAULT_LED_STATUS or None
+        }
+
 
 @dataclass
 class UIMetrics:
@@ -57,6 +74,47 @@ class LoggingConfig:
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "%(asctime)s - %(levelname)s - %(message)s"
     LOG_FILE: Optional[str] = None
+    LOG_MAX_BYTES: int = 1048576
+    LOG_BACKUP_COUNT: int = 3
+    LOG_RATE_LIMIT: int = 20
+    LOG_RATE_INTERVAL: float = 10.0
+
+
+@dataclass
+class TransportConfig:
+    """USB transport tuning."""
+    STATE_TTL: float = 0.5
+    MIN_TRANSFER_GAP: float = 0.1
+    ADAPTIVE_PACING: bool = False
+    ADAPTIVE_MIN_GAP: float = 0.005
+    VOLUME_FLUSH_DELAY: float = 0.05
+    VOLUME_CONFIRM_MAX_AGE: float = 1.0
+    PRESENCE_CHECK_INTERVAL: float = 2.0
+    RECONNECT_BACKOFF_INITIAL: float = 0.5
+    RECONNECT_BACKOFF_MAX: float = 10.0
+    BACKEND: str = "usb"
+    SIM_DEVICES: int = 1
+    SIM_LATENCY: float = 0.002
+    SIM_JITTER: float = 0.0
+    SIM_FAULT_RATE: float = 0.0
+    METRICS_ENABLED: bool = False
+    METRICS_LOG_INTERVAL: float = 300.0
+    POLL_ENABLED: bool = True
+    POLL_INTERVAL_MIN: float = 0.5
+    POLL_INTERVAL_MAX: float = 5.0
+    READ_TIMEOUT_MS: int = 250
+    WRITE_TIMEOUT_MS: int = 1000
+    RETRY_ATTEMPTS: int = 2
+    RETRY_BACKOFF: float = 0.02
+    BREAKER_THRESHOLD: int = 3
+    BREAKER_COOLDOWN: float = 5.0
+    CAPTURE_FILE: Optional[str] = None
+
+
+@dataclass
+class DaemonConfig:
+    """Background daemon settings."""
+    SOCKET_PATH: Optional[str] = None
 
 
 @dataclass
@@ -67,6 +125,10 @@ class AppConfig:
     default_settings: DefaultSettings = field(default_factory=DefaultSettings)
     ui_metrics: UIMetrics = field(default_factory=UIMetrics)
     logging: LoggingConfig = field(default_factory=LoggingConfig)
+    transport: TransportConfig = field(default_factory=TransportConfig)
+    daemon: DaemonConfig = field(default_factory=DaemonConfig)
+    # Preset name -> settings mapping keyed by device field name
+    presets: Dict[str, Dict[str, Any]] = field(default_factory=dict)
 
     @classmethod
     def load_from_file(cls, config_path: str) -> 'AppConfig':
@@ -88,37 +150,69 @@ class AppConfig:
         with open(config_path, 'r') as f:
             config_data = json.load(f)
 
+        return cls.from_dict(config_data)
+
+    @classmethod
+    def from_dict(cls, config_data: Dict[str, Any]) -> 'AppConfig':
+        """Build a configuration from parsed JSON data.
+
+        Args:
+            config_data: Dictionary of section name to section values;
+                missing sections and keys keep their defaults. "presets"
+                maps preset names to settings mappings.
+
+        Returns:
+            AppConfig instance with the given settings.
+        """
         return cls(
             device_constants=DeviceConstants(**config_data.get('device_constants', {})),
             device_identifiers=DeviceIdentifiers(**config_data.get('device_identifiers', {})),
             default_settings=DefaultSettings(**config_data.get('default_settings', {})),
             ui_metrics=UIMetrics(**config_data.get('ui_metrics', {})),
-            logging=LoggingConfig(**config_data.get('logging', {}))
+            logging=LoggingConfig(**config_data.get('logging', {})),
+            transport=TransportConfig(**config_data.get('transport', {})),
+            daemon=DaemonConfig(**config_data.get('daemon', {})),
+            presets=dict(config_data.get('presets', {}))
         )
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the configuration as JSON-serializable data.
+
+        Returns:
+            Dictionary of section name to section values.
+        """
+        return {
+            'device_constants': self.device_constants.__dict__,
+            'device_identifiers': self.device_identifiers.__dict__,
+            'default_settings': self.default_settings.__dict__,
+            'ui_metrics': self.ui_metrics.__dict__,
+            'logging': self.logging.__dict__,
+            'transport': self.transport.__dict__,
+            'daemon': self.daemon.__dict__,
+            'presets': self.presets
+        }
+
+    def to_json(self) -> str:
+        """Serialize the configuration as it is written to disk.
+
+        Returns:
+            Indented JSON text.
+        """
+        return json.dumps(self.to_dict(), indent=4)
+
     def save_to_file(self, config_path: str) -> None:
         """Save current configuration to a JSON file.
 
+        The file is replaced atomically, so a crash mid-write leaves the
+        previous version intact.
+
         Args:
             config_path: Path where to save the configuration file.
 
         Raises:
             IOError: If the file cannot be written.
         """
-        config_dir = os.path.dirname(config_path)
-        if config_dir:
-            Path(config_dir).mkdir(parents=True, exist_ok=True)
-
-        config_data = {
-            'device_constants': self.device_constants.__dict__,
-            'device_identifiers': self.device_identifiers.__dict__,
-            'default_settings': self.default_settings.__dict__,
-            'ui_metrics': self.ui_metrics.__dict__,
-            'logging': self.logging.__dict__
-        }
-
-        with open(config_path, 'w') as f:
-            json.dump(config_data, f, indent=4)
+        write_atomic(config_path, self.to_json())
 
     def get_constants_dict(self) -> Dict[str, any]:
         """Get all constants as a dictionary for device communication.
@@ -138,4 +232,50 @@ class AppConfig:
             'LED_STATUS_ENABLED': self.device_constants.LED_STATUS_ENABLED,
             'LED_STATUS_TEMP_OFF': self.device_constants.LED_STATUS_TEMP_OFF,
             'LED_STATUS_OFF': self.device_constants.LED_STATUS_OFF
-        } 
\ No newline at end of file
+        }
+
+
+def write_atomic(path: str, text: str) -> None:
+    """Replace a file's contents atomically.
+
+    The text is written to a temporary file in the same directory, flushed
+    to disk and renamed over the target, so readers see either the old or
+    the new contents, never a partial file.
+
+    Args:
+        path: The file to write.
+        text: The new contents.
+
+    Raises:
+        IOError: If the file cannot be written.
+    """
+    directory = os.path.dirname(path) or '.'
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            os.chmod(temp_path, os.stat(path).st_mode & 0o777)
+        else:
+            os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+    try:
+        # Persist the rename itself
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
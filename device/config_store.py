@@ -0,0 +1,180 @@
+import copy
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+from device.config import AppConfig, DEFAULT_CONFIG_PATH, write_atomic
+
+# Parsed file contents by path, keyed on (mtime_ns, size, inode), shared by
+# every store in the process. Only long-running processes such as the daemon,
+# which reloads the file for every preset request, gain from it; a one-shot
+# CLI run still parses the file once.
+_parsed: Dict[str, Tuple[Tuple[int, int, int], str, Dict[str, Any]]] = {}
+_parsed_lock = threading.Lock()
+
+
+class ConfigStore:
+    """Loads and saves the configuration file.
+
+    Loads reuse the parsed contents while the file's mtime, size and inode
+    are unchanged. Saves are atomic and skipped when the serialized text is
+    what the file already holds. schedule_save() debounces rapid edits into
+    a single write.
+    """
+
+    def __init__(self, path: str = DEFAULT_CONFIG_PATH, autosave_delay: float = 1.0) -> None:
+        """Initialize the store.
+
+        Args:
+            path: Configuration file path; ~ is expanded.
+            autosave_delay: Seconds schedule_save() waits for further edits.
+        """
+        self.path = os.path.expanduser(path)
+        self.autosave_delay = autosave_delay
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._scheduled: Optional[AppConfig] = None
+        self._writes = 0
+        self._skipped = 0
+
+    def exists(self) -> bool:
+        """Check whether the configuration file exists.
+
+        Returns:
+            True if the file exists.
+        """
+        return os.path.exists(self.path)
+
+    def _stat_key(self) -> Optional[Tuple[int, int, int]]:
+        """Get the file's (mtime_ns, size, inode), or None if it doesn't exist."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _read(self) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Get the file's text and parsed data, parsing only if it changed.
+
+        Raises:
+            json.JSONDecodeError: If the file is invalid JSON.
+        """
+        key = self._stat_key()
+        if key is None:
+            return None
+        with _parsed_lock:
+            cached = _parsed.get(self.path)
+            if cached is not None and cached[0] == key:
+                return cached[1], cached[2]
+        with open(self.path, 'r') as f:
+            text = f.read()
+        data = json.loads(text)
+        with _parsed_lock:
+            _parsed[self.path] = (key, text, data)
+        return text, data
+
+    def load(self) -> AppConfig:
+        """Load the configuration, or the defaults if the file doesn't exist.
+
+        While a scheduled save is pending its configuration is returned, so
+        an edit made on top of a load never drops the edit before it.
+
+        Returns:
+            A new AppConfig instance; callers may modify it freely.
+
+        Raises:
+            json.JSONDecodeError: If the file is invalid JSON.
+        """
+        with self._lock:
+            scheduled = self._scheduled
+        if scheduled is not None:
+            return AppConfig.from_dict(copy.deepcopy(scheduled.to_dict()))
+        contents = self._read()
+        if contents is None:
+            return AppConfig()
+        return AppConfig.from_dict(copy.deepcopy(contents[1]))
+
+    def save(self, config: AppConfig) -> bool:
+        """Write the configuration if it differs from the file.
+
+        Any pending scheduled save is superseded.
+
+        Args:
+            config: The configuration to save.
+
+        Returns:
+            True if the file was written, False if it was already up to date.
+
+        Raises:
+            IOError: If the file cannot be written.
+        """
+        with self._lock:
+            self._cancel_timer()
+            self._scheduled = None
+            return self._write(config)
+
+    def _write(self, config: AppConfig) -> bool:
+        """Write the configuration if changed; the caller holds the lock."""
+        text = config.to_json()
+        try:
+            contents = self._read()
+        except (OSError, ValueError):
+            contents = None
+        if contents is not None and contents[0] == text:
+            self._skipped += 1
+            logging.debug("Configuration unchanged; write skipped.")
+            return False
+        write_atomic(self.path, text)
+        self._writes += 1
+        key = self._stat_key()
+        if key is not None:
+            with _parsed_lock:
+                _parsed[self.path] = (key, text, json.loads(text))
+        logging.info("Configuration saved to %s", self.path)
+        return True
+
+    def schedule_save(self, config: AppConfig) -> None:
+        """Save the configuration after autosave_delay seconds without further edits.
+
+        Args:
+            config: The configuration to save; its state when the delay ends
+                is what gets written.
+        """
+        with self._lock:
+            self._scheduled = config
+            self._cancel_timer()
+            self._timer = threading.Timer(self.autosave_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> bool:
+        """Write a scheduled save now.
+
+        Returns:
+            True if the file was written.
+        """
+        with self._lock:
+            self._cancel_timer()
+            config, self._scheduled = self._scheduled, None
+            if config is None:
+                return False
+            try:
+                return self._write(config)
+            except OSError:
+                logging.exception("Failed to save configuration")
+                return False
+
+    def _cancel_timer(self) -> None:
+        """Cancel the autosave timer; the caller holds the lock."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def stats(self) -> Dict[str, int]:
+        """Get save statistics.
+
+        Returns:
+            Dictionary with the number of writes and skipped unchanged saves.
+        """
+        return {'writes': self._writes, 'skipped': self._skipped}
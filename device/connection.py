@@ -0,0 +1,199 @@
+import errno
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+from device.errors import DeviceDisconnectedError
+
+# libusb reports an unplugged device as LIBUSB_ERROR_NO_DEVICE
+LIBUSB_ERROR_NO_DEVICE = -4
+
+
+def device_path(usb_device: Any) -> str:
+    """Build the bus/port path of a USB device.
+
+    The path stays the same as long as the device is plugged into the same
+    port, unlike the address which changes on every enumeration.
+
+    Args:
+        usb_device: The pyusb device.
+
+    Returns:
+        Path in the form "<bus>-<port>[.<port>...]".
+    """
+    ports = getattr(usb_device, 'port_numbers', None)
+    if ports:
+        return f"{usb_device.bus}-{'.'.join(str(port) for port in ports)}"
+    return f"{usb_device.bus}-{usb_device.address}"
+
+
+def is_disconnect_error(error: BaseException) -> bool:
+    """Check whether a transfer error means the device is gone.
+
+    Args:
+        error: The exception raised by the transfer.
+
+    Returns:
+        True if the device was unplugged.
+    """
+    return (
+        getattr(error, 'errno', None) == errno.ENODEV
+        or getattr(error, 'backend_error_code', None) == LIBUSB_ERROR_NO_DEVICE
+    )
+
+
+class ConnectionManager:
+    """Tracks whether the device is attached and reconnects when it returns.
+
+    A disconnect is noticed either from a transfer error or from a periodic
+    presence check, which probes the held handle and only enumerates the
+    bus when the probe fails. While disconnected, check() fails immediately and a
+    background thread looks for the device again with bounded exponential
+    backoff, handing the new handle to on_reconnect once found.
+    """
+
+    def __init__(
+        self,
+        finder: Callable[[], Optional[Any]],
+        on_reconnect: Callable[[Any], None],
+        presence_interval: float = 0.0,
+        backoff_initial: float = 0.5,
+        backoff_max: float = 10.0,
+        probe: Optional[Callable[[], Any]] = None
+    ) -> None:
+        """Initialize the manager.
+
+        Args:
+            finder: Looks the device up on the bus; returns None if absent.
+            on_reconnect: Receives the new device handle after a reconnect.
+            presence_interval: Seconds between presence checks; 0 disables them.
+            backoff_initial: First delay between reconnect attempts.
+            backoff_max: Longest delay between reconnect attempts.
+            probe: Cheap check on the held device handle that raises once
+                the device is gone; presence checks scan the bus with
+                finder only after it fails, or always when omitted.
+        """
+        self.finder = finder
+        self.probe = probe
+        self.on_reconnect = on_reconnect
+        self.presence_interval = presence_interval
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.connected = True
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._listeners: List[Callable[[bool], None]] = []
+        self._reconnects = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the monitor thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._monitor, name="dawnpro-connection", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the monitor thread."""
+        self._stop.set()
+        self._wake.set()
+
+    def add_listener(self, listener: Callable[[bool], None]) -> None:
+        """Register a callback for connection changes.
+
+        Args:
+            listener: Called with True on reconnect and False on disconnect,
+                from the thread that noticed the change.
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[bool], None]) -> None:
+        """Unregister a connection change callback.
+
+        Args:
+            listener: The callback passed to add_listener.
+        """
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def check(self) -> None:
+        """Fail fast if the device is known to be absent.
+
+        Raises:
+            DeviceDisconnectedError: If the device is disconnected.
+        """
+        if not self.connected:
+            raise DeviceDisconnectedError("Device disconnected")
+
+    def mark_disconnected(self) -> None:
+        """Record that the device is gone and start looking for it."""
+        with self._lock:
+            if not self.connected:
+                return
+            self.connected = False
+        logging.warning("Device disconnected; waiting for it to return.")
+        self._notify(False)
+        self.start()
+        self._wake.set()
+
+    def _monitor(self) -> None:
+        """Run presence checks while connected and reconnects while not."""
+        delay = self.backoff_initial
+        while not self._stop.is_set():
+            if self.connected:
+                delay = self.backoff_initial
+                interval = self.presence_interval if self.presence_interval > 0 else None
+                self._wake.wait(interval)
+                self._wake.clear()
+                if self._stop.is_set():
+                    break
+                if self.connected and interval is not None and not self._present():
+                    self.mark_disconnected()
+                continue
+
+            usb_device = self._find()
+            if usb_device is not None:
+                self.on_reconnect(usb_device)
+                with self._lock:
+                    self.connected = True
+                    self._reconnects += 1
+                logging.info("Device reconnected.")
+                self._notify(True)
+                continue
+            self._stop.wait(delay)
+            delay = min(self.backoff_max, delay * 2)
+
+    def _find(self) -> Optional[Any]:
+        """Look the device up, treating lookup errors as absence."""
+        try:
+            return self.finder()
+        except Exception as error:
+            logging.debug("Device lookup failed: %s", error)
+            return None
+
+    def _present(self) -> bool:
+        """Check that the device is still on the bus."""
+        if self.probe is not None:
+            try:
+                self.probe()
+                return True
+            except Exception as error:
+                logging.debug("Presence probe failed: %s", error)
+        return self._find() is not None
+
+    def _notify(self, connected: bool) -> None:
+        """Tell listeners about a connection change."""
+        for listener in list(self._listeners):
+            try:
+                listener(connected)
+            except Exception:
+                logging.exception("Connection listener failed")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get connection statistics.
+
+        Returns:
+            Dictionary with the connection state and reconnect count.
+        """
+        return {'connected': self.connected, 'reconnects': self._reconnects}
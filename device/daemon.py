@@ -0,0 +1,536 @@
+"""Headless daemon that keeps the device open and serves JSON-RPC requests.
+
+Requests and responses are JSON-RPC 2.0 objects, one per line, over a Unix
+domain socket. A connection may carry any number of requests. Run with:
+
+    python -m device.daemon [--socket PATH]
+
+This module only imports pyusb when the server starts, so clients can use
+DaemonClient without loading the USB stack.
+"""
+import argparse
+import dataclasses
+import inspect
+import json
+import logging
+import os
+import signal
+import socket
+import socketserver
+import sys
+from typing import Any, Callable, Dict, Optional, Tuple
+from device.config import AppConfig, DEFAULT_CONFIG_PATH
+from device.config_store import ConfigStore
+from device.log import setup_logging
+import device.presets as presets
+import device.protocol as protocol
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+DEVICE_ERROR = -32000
+
+# Accepted JSON types of every method parameter, by parameter name
+PARAM_TYPES: Dict[str, Tuple[type, ...]] = {
+    'rescan': (bool,),
+    'force': (bool,),
+    'dry_run': (bool,),
+    'max_age': (int, float),
+    'volume': (int,),
+    'delta': (int,),
+    'gain': (str,),
+    'filter_type': (str,),
+    'status': (str,),
+    'name': (str,),
+    'device': (str,),
+    'settings': (dict,)
+}
+
+# Parameters holding a device setting value, mapped to the setting
+SETTING_PARAMS = {'volume': 'volume', 'gain': 'gain', 'filter_type': 'filter_type', 'status': 'led_status'}
+
+
+class DaemonError(Exception):
+    """Error returned by the daemon for a request."""
+
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+
+
+def default_socket_path(config: AppConfig) -> str:
+    """Get the socket path the daemon listens on.
+
+    Args:
+        config: Application configuration instance.
+
+    Returns:
+        The configured SOCKET_PATH, otherwise dawnpro.sock in
+        $XDG_RUNTIME_DIR, falling back to a per-user path in /tmp.
+    """
+    if config.daemon.SOCKET_PATH:
+        return os.path.expanduser(config.daemon.SOCKET_PATH)
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        return os.path.join(runtime_dir, 'dawnpro.sock')
+    return f"/tmp/dawnpro-{os.getuid()}.sock"
+
+
+def to_jsonable(value: Any) -> Any:
+    """Convert result objects such as DeviceState into JSON-friendly values."""
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        data = {name: to_jsonable(item) for name, item in dataclasses.asdict(value).items()}
+        if hasattr(value, 'ok'):
+            data['ok'] = value.ok
+        return data
+    if isinstance(value, dict):
+        return {key: to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(item) for item in value]
+    return value
+
+
+class DeviceService:
+    """The methods exposed over JSON-RPC."""
+
+    def __init__(self, config: AppConfig, store: Optional[ConfigStore] = None) -> None:
+        """Initialize the service and enumerate devices.
+
+        Args:
+            config: Application configuration instance.
+            store: Store presets are read from and saved to; presets live
+                only in config when omitted.
+        """
+        from device.registry import DeviceRegistry, selected_device
+        self.config = config
+        self.store = store
+        self.registry = DeviceRegistry(config)
+        self.default_device = selected_device(config)
+
+    def _device(self, device: Optional[str]) -> Any:
+        """Open a device, defaulting to the selected one."""
+        try:
+            return self.registry.open(device or self.default_device)
+        except ValueError as error:
+            raise LookupError(str(error)) from error
+
+    def _locked(self, device: Optional[str], operation: Callable[[Any], Any]) -> Any:
+        """Run an operation on a device as one transport transaction."""
+        moondrop = self._device(device)
+        with moondrop.transaction():
+            return operation(moondrop)
+
+    def _write(self, device: Optional[str], force: bool, operation: Callable[[Any, bool], Any]) -> Any:
+        """Run writes after reading the settings they are compared against.
+
+        Nothing polls the device here, so without a fresh read a write could
+        be skipped because of a value changed since, e.g. with the knob. If
+        the read fails every write is sent.
+
+        Args:
+            device: Device identifier; the selected device when None.
+            force: Send every write without reading first.
+            operation: Called with the device and whether to force writes.
+        """
+        def synced(moondrop: Any) -> Any:
+            return operation(moondrop, force or moondrop.get_state(max_age=0) is None)
+        return self._locked(device, synced)
+
+    def ping(self) -> str:
+        """Check that the daemon is alive."""
+        return "pong"
+
+    def list_devices(self, rescan: bool = False) -> Any:
+        """List attached devices, rescanning the bus if asked."""
+        infos = self.registry.scan() if rescan else self.registry.devices()
+        return to_jsonable(infos)
+
+    def get_state(self, max_age: Optional[float] = None, device: Optional[str] = None) -> Any:
+        """Get a snapshot of every device setting."""
+        return to_jsonable(self._locked(device, lambda m: m.get_state(max_age)))
+
+    def get_volume(self, device: Optional[str] = None) -> Any:
+        """Read the current volume (0-60)."""
+        return self._locked(device, lambda m: m.get_current_volume())
+
+    def set_volume(self, volume: int, force: bool = False, device: Optional[str] = None) -> Any:
+        """Set the volume (0-60)."""
+        protocol.validate_settings({'volume': volume})
+        return self._write(device, force, lambda m, force: m.set_volume(volume, force))
+
+    def adjust_volume(self, delta: int, device: Optional[str] = None) -> Any:
+        """Change the volume by delta steps and return the new volume."""
+        def operation(moondrop: Any) -> Optional[int]:
+            # Always read the device: the knob may have moved since the
+            # volume was last seen, and nothing polls it here
+            current = moondrop.get_current_volume()
+            if current is None:
+                return None
+            target = max(0, min(60, current + int(delta)))
+            return target if moondrop.set_volume(target) else None
+        return self._locked(device, operation)
+
+    def set_gain(self, gain: str, force: bool = False, device: Optional[str] = None) -> Any:
+        """Set the gain ("Low" or "High")."""
+        protocol.validate_settings({'gain': gain})
+        return self._write(device, force, lambda m, force: m.set_gain(gain, force))
+
+    def set_filter(self, filter_type: str, force: bool = False, device: Optional[str] = None) -> Any:
+        """Set the filter type."""
+        protocol.validate_settings({'filter_type': filter_type})
+        return self._write(device, force, lambda m, force: m.set_filter(filter_type, force))
+
+    def set_led_status(self, status: str, force: bool = False, device: Optional[str] = None) -> Any:
+        """Set the LED status."""
+        protocol.validate_settings({'led_status': status})
+        return self._write(device, force, lambda m, force: m.set_led_status(status, force))
+
+    def apply(self, settings: Dict[str, Any], force: bool = False, device: Optional[str] = None) -> Any:
+        """Apply several settings as one batch."""
+        protocol.validate_settings(settings)
+        return to_jsonable(self._write(device, force, lambda m, force: m.apply(settings, force)))
+
+    def _preset_config(self) -> AppConfig:
+        """Get the configuration holding the current presets.
+
+        With a store the file is re-read when it changed, so presets saved
+        by the GUI are seen without restarting the daemon.
+        """
+        return self.store.load() if self.store is not None else self.config
+
+    def list_presets(self) -> Any:
+        """Get every preset's settings keyed by name."""
+        config = self._preset_config()
+        return {name: config.presets[name] for name in presets.preset_names(config)}
+
+    def apply_preset(
+        self, name: str, force: bool = False, dry_run: bool = False, device: Optional[str] = None
+    ) -> Any:
+        """Apply a preset, writing only the fields that differ from the device.
+
+        With dry_run, return the fields that would be written instead.
+        """
+        try:
+            settings = presets.get_preset(self._preset_config(), name)
+        except ValueError as error:
+            raise DaemonError(INVALID_PARAMS, str(error)) from error
+        if dry_run:
+            return self._write(
+                device, force,
+                lambda m, force: presets.preset_diff(settings, {} if force else m.known_state.confirmed())
+            )
+        return to_jsonable(self._write(device, force, lambda m, force: m.apply(settings, force)))
+
+    def save_preset(
+        self, name: str, settings: Optional[Dict[str, Any]] = None, device: Optional[str] = None
+    ) -> Any:
+        """Save a preset, capturing the device's current settings if none are given."""
+        if settings is None:
+            state = self._locked(device, lambda m: m.get_state(max_age=0))
+            if state is None:
+                raise IOError("Failed to read device state")
+            settings = {
+                'volume': state.volume,
+                'gain': state.gain,
+                'filter_type': state.filter_type,
+                'led_status': state.led_status
+            }
+        config = self._preset_config()
+        try:
+            stored = presets.save_preset(config, name, settings)
+        except ValueError as error:
+            raise DaemonError(INVALID_PARAMS, str(error)) from error
+        if self.store is not None:
+            self.store.save(config)
+        return stored
+
+    def delete_preset(self, name: str) -> bool:
+        """Remove a preset; False if it didn't exist."""
+        config = self._preset_config()
+        if not presets.delete_preset(config, name):
+            return False
+        if self.store is not None:
+            self.store.save(config)
+        return True
+
+    def stats(self, device: Optional[str] = None) -> Any:
+        """Get transport statistics and, when enabled, transfer metrics."""
+        return self._device(device).stats()
+
+    METHODS = (
+        'ping', 'list_devices', 'get_state', 'get_volume', 'set_volume',
+        'adjust_volume', 'set_gain', 'set_filter', 'set_led_status', 'apply',
+        'list_presets', 'apply_preset', 'save_preset', 'delete_preset', 'stats'
+    )
+
+    def dispatch(self, request: Any) -> Optional[Dict[str, Any]]:
+        """Execute one JSON-RPC request.
+
+        Args:
+            request: The decoded request object.
+
+        Returns:
+            The response object, or None for notifications, which get no
+            reply even when they fail.
+        """
+        if not isinstance(request, dict) or not isinstance(request.get('method'), str):
+            return _error(None, INVALID_REQUEST, "Invalid request")
+        request_id = request.get('id')
+        method = request['method']
+        params = request.get('params') or {}
+        if method not in self.METHODS:
+            response = _error(request_id, METHOD_NOT_FOUND, f"Method not found: {method}")
+        else:
+            try:
+                bound = self._bind(method, params)
+                result = getattr(self, method)(*bound.args, **bound.kwargs)
+            except DaemonError as error:
+                response = _error(request_id, error.code, str(error))
+            except (LookupError, IOError) as error:
+                response = _error(request_id, DEVICE_ERROR, str(error))
+            except Exception:
+                logging.exception("Request %r failed", method)
+                response = _error(request_id, INTERNAL_ERROR, "Internal error")
+            else:
+                response = {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+        if 'id' not in request:
+            return None
+        return response
+
+
+    def _bind(self, method: str, params: Any) -> inspect.BoundArguments:
+        """Check a request's parameters against the method before calling it.
+
+        Only parameters are checked here, so any error raised by the method
+        itself is an internal or device error rather than the client's.
+
+        Args:
+            method: The method name.
+            params: The request's params, an array or an object.
+
+        Returns:
+            The parameters bound to the method's signature.
+
+        Raises:
+            DaemonError: With INVALID_PARAMS if a parameter is missing,
+                unknown, of the wrong type or out of range.
+        """
+        signature = inspect.signature(getattr(self, method))
+        try:
+            if isinstance(params, list):
+                bound = signature.bind(*params)
+            elif isinstance(params, dict):
+                bound = signature.bind(**params)
+            else:
+                raise TypeError("params must be an array or an object")
+        except TypeError as error:
+            raise DaemonError(INVALID_PARAMS, str(error)) from error
+
+        for name, value in bound.arguments.items():
+            if value is None and signature.parameters[name].default is None:
+                continue
+            expected = PARAM_TYPES[name]
+            # JSON true/false decode to bool, which is also an int
+            if not isinstance(value, expected) or (isinstance(value, bool) and bool not in expected):
+                raise DaemonError(INVALID_PARAMS, f"Invalid {name}: {value!r}")
+        if bound.arguments.get('max_age') is not None and bound.arguments['max_age'] < 0:
+            raise DaemonError(INVALID_PARAMS, f"Invalid max_age: {bound.arguments['max_age']!r}")
+
+        settings = {
+            SETTING_PARAMS[name]: value for name, value in bound.arguments.items() if name in SETTING_PARAMS
+        }
+        settings.update(bound.arguments.get('settings') or {})
+        try:
+            protocol.validate_settings(settings)
+        except ValueError as error:
+            raise DaemonError(INVALID_PARAMS, str(error)) from error
+        return bound
+
+
+def _error(request_id: Any, code: int, message: str) -> Dict[str, Any]:
+    """Build a JSON-RPC error response."""
+    return {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': code, 'message': message}}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Serves line-delimited JSON-RPC requests on one connection."""
+
+    def handle(self) -> None:
+        service: DeviceService = self.server.service  # type: ignore[attr-defined]
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError:
+                response: Optional[Dict[str, Any]] = _error(None, PARSE_ERROR, "Parse error")
+            else:
+                response = service.dispatch(request)
+            if response is not None:
+                self.wfile.write(json.dumps(response, separators=(',', ':')).encode() + b'\n')
+                self.wfile.flush()
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Threaded Unix socket server holding the open devices."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, service: DeviceService) -> None:
+        """Bind the socket, replacing a stale one left by a dead daemon.
+
+        Args:
+            socket_path: Filesystem path of the Unix socket.
+            service: The service that executes requests.
+
+        Raises:
+            OSError: If another daemon is already listening on the path.
+        """
+        self.service = service
+        self.socket_path = socket_path
+        if os.path.exists(socket_path):
+            if _is_listening(socket_path):
+                raise OSError(f"A daemon is already listening on {socket_path}")
+            os.unlink(socket_path)
+        super().__init__(socket_path, _RequestHandler)
+        os.chmod(socket_path, 0o600)
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            os.unlink(self.socket_path)
+        except OSError:
+            pass
+
+
+def _is_listening(socket_path: str) -> bool:
+    """Check whether a live process accepts connections on a socket path."""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+class DaemonClient:
+    """Client for the daemon's JSON-RPC socket.
+
+    The connection is opened on first use and reused for later calls.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 5.0) -> None:
+        """Initialize the client.
+
+        Args:
+            socket_path: Filesystem path of the daemon socket.
+            timeout: Seconds to wait for a response.
+        """
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._socket: Optional[socket.socket] = None
+        self._reader: Any = None
+        self._next_id = 0
+
+    def connect(self) -> None:
+        """Connect to the daemon.
+
+        Raises:
+            OSError: If no daemon is listening.
+        """
+        if self._socket is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            self._socket = sock
+            self._reader = sock.makefile('rb')
+
+    def close(self) -> None:
+        """Close the connection."""
+        if self._socket is not None:
+            self._reader.close()
+            self._socket.close()
+            self._socket = None
+
+    def __enter__(self) -> 'DaemonClient':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def call(self, method: str, **params: Any) -> Any:
+        """Call a daemon method.
+
+        Args:
+            method: The method name.
+            **params: Named method parameters.
+
+        Returns:
+            The method's result.
+
+        Raises:
+            DaemonError: If the daemon reports an error.
+            OSError: If the daemon cannot be reached.
+        """
+        self.connect()
+        self._next_id += 1
+        request = {'jsonrpc': '2.0', 'id': self._next_id, 'method': method, 'params': params}
+        self._socket.sendall(json.dumps(request, separators=(',', ':')).encode() + b'\n')
+        line = self._reader.readline()
+        if not line:
+            self.close()
+            raise ConnectionError("Daemon closed the connection")
+        response = json.loads(line)
+        if 'error' in response:
+            raise DaemonError(response['error']['code'], response['error']['message'])
+        return response.get('result')
+
+
+def main(argv: Optional[list] = None) -> int:
+    """Run the daemon until interrupted.
+
+    Args:
+        argv: Command-line arguments, defaults to sys.argv[1:].
+
+    Returns:
+        Process exit status.
+    """
+    parser = argparse.ArgumentParser(description="DawnPro device daemon")
+    parser.add_argument('--socket', help="Unix socket path to listen on")
+    parser.add_argument('--config', default=DEFAULT_CONFIG_PATH, help="Configuration file")
+    args = parser.parse_args(argv)
+
+    store = ConfigStore(args.config)
+    config = store.load()
+    # The daemon logs to stderr (the journal); the log file belongs to the GUI
+    setup_logging(config, use_file=False)
+    socket_path = args.socket or default_socket_path(config)
+    try:
+        service = DeviceService(config, store)
+        service.registry.scan()
+        server = DaemonServer(socket_path, service)
+    except (ValueError, OSError) as error:
+        logging.error("Failed to start daemon: %s", error)
+        return 1
+
+    logging.info("Daemon listening on %s", socket_path)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
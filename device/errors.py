@@ -0,0 +1,6 @@
+class DeviceDisconnectedError(IOError):
+    """Raised without touching the bus while the device is unplugged."""
+
+
+class DeviceWedgedError(IOError):
+    """Raised without touching the bus while the device is not responding."""
@@ -1,6 +1,7 @@
 import logging
 from typing import List, Optional, Any, Dict
-import device.utils as utils
+import device.protocol as protocol
+from device.state import DeviceState
 
 
 class GetMethods:
@@ -15,6 +16,7 @@ class GetMethods:
         """
         self.device = device
         self.constants = constants
+        self._refresh_frame = bytes(constants['VOLUME_REFRESH_DATA'])
 
     def get_data(self) -> List[int]:
         """Retrieve data from the device.
@@ -29,26 +31,60 @@ class GetMethods:
             List of integers containing the device data, or empty list if failed.
         """
         try:
-            self.device.send_control_transfer(
-                self.constants['BM_REQUEST_TYPE_OUT'],
-                self.constants['B_REQUEST'],
-                self.constants['W_VALUE'],
-                self.constants['W_INDEX'],
-                [0xC0, 0xA5, 0xA3]
-            )
-            response = self.device.send_control_transfer(
-                self.constants['BM_REQUEST_TYPE_IN'],
-                self.constants['B_REQUEST_GET'],
-                self.constants['W_VALUE'],
-                self.constants['W_INDEX'],
-                self.constants['DATA_LENGTH']
-            )
-            logging.info(f"Data retrieved from device: {response}")
+            response = self.device.query(protocol.SETTINGS_QUERY_FRAME)
+            logging.debug("Data retrieved from device: %s", response)
             return response
         except IOError:
             logging.error("Failed to retrieve data from the device.")
             return []
 
+    def read_volume(self) -> List[int]:
+        """Send the volume refresh command and read back its response.
+
+        Returns:
+            The raw 7-byte volume response.
+
+        Raises:
+            IOError: If the USB control transfer fails.
+        """
+        return self.device.query(self._refresh_frame)
+
+    def read_state(self) -> Optional[DeviceState]:
+        """Read every setting from the device in a single pass.
+
+        Performs one settings read and one volume read and decodes all
+        fields at once. Both reads run in one transaction so no write from
+        another thread lands between them.
+
+        Returns:
+            A fresh DeviceState, or None if the settings read failed.
+        """
+        with self.device.transaction():
+            data = self.get_data()
+            if not data:
+                return None
+            try:
+                volume_response = self.read_volume()
+            except IOError:
+                logging.error("Failed to get current volume.")
+                volume_response = None
+        try:
+            state = DeviceState.from_responses(data, volume_response)
+        except ValueError as error:
+            logging.error("Failed to decode device state: %s", error)
+            return None
+        if volume_response:
+            self.device.volume = volume_response[4]
+            self.device.known_state.observe('volume', state.volume)
+        self.device.known_state.observe('gain', state.gain)
+        self.device.known_state.observe('filter_type', state.filter_type)
+        self.device.known_state.observe('led_status', state.led_status)
+        self.device.current_gain = state.gain
+        self.device.current_filter = state.filter_type
+        self.device.led_status = state.led_status
+        logging.info("Device state read: %s.", state)
+        return state
+
     def get_current_volume(self) -> Optional[int]:
         """Get the current volume from the device.
         
@@ -60,60 +96,48 @@ class GetMethods:
             The current volume as a percentage (0-60), or None if failed.
         """
         try:
-            self.device.refresh_volume()
-            response = self.device.send_control_transfer(
-                self.constants['BM_REQUEST_TYPE_IN'],
-                self.constants['B_REQUEST_GET'],
-                self.constants['W_VALUE'],
-                self.constants['W_INDEX'],
-                self.constants['DATA_LENGTH']
-            )
-            volume_value = response[4]
-            self.device.volume = volume_value
-            percent_volume = utils.convert_volume_to_percent(volume_value)
-            logging.info(f"Current volume is {percent_volume}%.")
+            response = self.read_volume()
+            percent_volume = protocol.parse_volume(response)
+            self.device.volume = response[4]
+            self.device.known_state.observe('volume', percent_volume)
+            logging.debug("Current volume is %s%%.", percent_volume)
             return percent_volume
-        except IOError:
+        except (IOError, ValueError):
             logging.error("Failed to get current volume.")
             return None
 
     def get_current_led_status(self) -> Optional[str]:
-        """Get the current LED status.
+        """Get the current LED status from the latest state snapshot.
 
         Returns:
             The current LED status as a string, or None if failed.
         """
-        data = self.get_data()
-        if data:
-            led_status = utils.convert_led_status_to_string(data[5])
-            self.device.led_status = led_status
-            logging.info(f"Current LED status: {led_status}.")
-            return led_status
+        state = self.device.get_state()
+        if state:
+            logging.debug("Current LED status: %s.", state.led_status)
+            return state.led_status
         return None
 
     def get_gain(self) -> Optional[str]:
-        """Get the current gain setting.
+        """Get the current gain setting from the latest state snapshot.
 
         Returns:
             The current gain setting as a string, or None if failed.
         """
-        data = self.get_data()
-        if data:
-            gain = utils.convert_gain_to_string(int(data[4]))
-            self.device.current_gain = gain
-            logging.info(f"Current gain: {gain}.")
-            return gain
+        state = self.device.get_state()
+        if state:
+            logging.debug("Current gain: %s.", state.gain)
+            return state.gain
         return None
 
     def get_filter(self) -> Optional[str]:
-        """Get the current filter type.
+        """Get the current filter type from the latest state snapshot.
 
         Returns:
             The current filter type as a string, or None if failed.
         """
-        data = self.get_data()
-        if data:
-            filter_type = utils.convert_filter_payload_to_string(data[3])
-            logging.info(f"Current filter type: {filter_type}.")
-            return filter_type
+        state = self.device.get_state()
+        if state:
+            logging.debug("Current filter type: %s.", state.filter_type)
+            return state.filter_type
         return None
@@ -0,0 +1,160 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional
+from device.moondrop import Moondrop
+from device.registry import DeviceRegistry
+from device.state import ApplyResult, DeviceState
+
+
+@dataclass
+class DeviceOutcome:
+    """Result of one operation on one device of a group."""
+    identifier: str
+    value: Any = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """Whether the operation succeeded on this device."""
+        if self.error is not None:
+            return False
+        if isinstance(self.value, ApplyResult):
+            return self.value.ok
+        return self.value is not None and self.value is not False
+
+
+@dataclass
+class GroupResult:
+    """Aggregated outcome of an operation fanned out to a device group."""
+    outcomes: Dict[str, DeviceOutcome] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """Whether the operation succeeded on every device."""
+        return all(outcome.ok for outcome in self.outcomes.values())
+
+    def failed(self) -> List[str]:
+        """Get the devices the operation failed on.
+
+        Returns:
+            Identifiers of the failed devices.
+        """
+        return [name for name, outcome in self.outcomes.items() if not outcome.ok]
+
+
+class DeviceGroup:
+    """Runs the same operation on several devices concurrently.
+
+    Each device has its own transfer pacing, so running one thread per
+    device makes a group update take about as long as a single device.
+    """
+
+    def __init__(self, devices: Mapping[str, Moondrop], max_workers: Optional[int] = None) -> None:
+        """Initialize the group.
+
+        Args:
+            devices: Mapping of identifier to device.
+            max_workers: Upper bound on concurrent devices; one thread per
+                device when omitted.
+        """
+        self.devices = dict(devices)
+        self.max_workers = max_workers
+
+    @classmethod
+    def from_registry(
+        cls,
+        registry: DeviceRegistry,
+        identifiers: Optional[Iterable[str]] = None,
+        max_workers: Optional[int] = None
+    ) -> 'DeviceGroup':
+        """Build a group from registry devices.
+
+        Args:
+            registry: The device registry.
+            identifiers: Paths or serials to include; every attached device
+                when omitted.
+            max_workers: Upper bound on concurrent devices.
+
+        Returns:
+            DeviceGroup keyed by device path.
+
+        Raises:
+            ValueError: If an identifier matches no attached device.
+        """
+        if identifiers is None:
+            return cls(registry.open_all(), max_workers)
+        devices = {}
+        for identifier in identifiers:
+            info = registry.resolve(identifier)
+            devices[info.path] = registry.open(info.path)
+        return cls(devices, max_workers)
+
+    def run(self, operation: Callable[[Moondrop], Any]) -> GroupResult:
+        """Run an operation on every device concurrently.
+
+        Args:
+            operation: Called with each device; its return value is recorded.
+
+        Returns:
+            GroupResult with each device's value or error and timing.
+        """
+        started = time.monotonic()
+        result = GroupResult()
+        if not self.devices:
+            return result
+
+        def run_one(identifier: str, moondrop: Moondrop) -> DeviceOutcome:
+            device_started = time.monotonic()
+            outcome = DeviceOutcome(identifier)
+            try:
+                outcome.value = operation(moondrop)
+            except Exception as error:
+                logging.error("Group operation failed on %s: %s", identifier, error)
+                outcome.error = str(error)
+            outcome.elapsed = time.monotonic() - device_started
+            return outcome
+
+        workers = min(self.max_workers or len(self.devices), len(self.devices))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dawnpro-group") as pool:
+            futures = [
+                pool.submit(run_one, identifier, moondrop)
+                for identifier, moondrop in self.devices.items()
+            ]
+            for future in futures:
+                outcome = future.result()
+                result.outcomes[outcome.identifier] = outcome
+        result.elapsed = time.monotonic() - started
+        logging.info(
+            "Group operation on %d device(s) took %.0f ms (failed: %s).",
+            len(self.devices), result.elapsed * 1000, result.failed() or 'none'
+        )
+        return result
+
+    def apply(self, settings: Mapping[str, Any], force: bool = False) -> GroupResult:
+        """Apply the same settings to every device concurrently.
+
+        Args:
+            settings: Mapping of "volume", "gain", "filter_type" and/or
+                "led_status" to target values.
+            force: Send every write even if a device already holds the value.
+
+        Returns:
+            GroupResult whose values are each device's ApplyResult.
+        """
+        return self.run(lambda moondrop: moondrop.apply(settings, force))
+
+    def get_states(self, max_age: Optional[float] = None) -> Dict[str, Optional[DeviceState]]:
+        """Read every device's state concurrently.
+
+        Args:
+            max_age: Maximum age of a cached snapshot in seconds.
+
+        Returns:
+            Dictionary of identifier to state, None where the read failed.
+        """
+        result = self.run(lambda moondrop: moondrop.get_state(max_age))
+        return {name: outcome.value for name, outcome in result.outcomes.items()}
@@ -0,0 +1,200 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple
+
+
+class KnownStateCache:
+    """Last confirmed value of each device setting.
+
+    Values are confirmed by successful writes and by reads. Writes whose
+    target already matches the confirmed value can be skipped. Listeners
+    are told whenever a confirmed value changes.
+
+    A setting that can change behind our back, like the volume turned with
+    the hardware knob, can be given a maximum age: once its value is older
+    than that it no longer justifies skipping a write, though get() still
+    returns it.
+    """
+
+    FIELDS = ('volume', 'gain', 'filter_type', 'led_status')
+
+    def __init__(self, max_age: Optional[Mapping[str, float]] = None) -> None:
+        """Initialize an empty cache.
+
+        Args:
+            max_age: Seconds after which a field's value stops counting as
+                confirmed, by field name. Fields not listed never expire.
+        """
+        self.max_age: Dict[str, float] = dict(max_age or {})
+        self._lock = threading.Lock()
+        self._values: Dict[str, Any] = {}
+        self._updated: Dict[str, float] = {}
+        self._written = 0
+        self._elided = 0
+        self._mismatches = 0
+        self._invalidations = 0
+        self._listeners: List[Tuple[Callable[[str, Any], None], Optional[FrozenSet[str]]]] = []
+
+    def add_listener(
+        self,
+        listener: Callable[[str, Any], None],
+        fields: Optional[Iterable[str]] = None
+    ) -> None:
+        """Register a callback for value changes.
+
+        Args:
+            listener: Called with (field, value) from the thread that
+                confirmed or observed the new value.
+            fields: Settings to watch; all of them when omitted.
+        """
+        self._listeners.append((listener, frozenset(fields) if fields is not None else None))
+
+    def remove_listener(self, listener: Callable[[str, Any], None]) -> None:
+        """Unregister a value change callback.
+
+        Args:
+            listener: The callback passed to add_listener.
+        """
+        self._listeners = [entry for entry in self._listeners if entry[0] != listener]
+
+    def get(self, field: str) -> Optional[Any]:
+        """Get the confirmed value of a setting.
+
+        Args:
+            field: The setting name.
+
+        Returns:
+            The confirmed value, or None if unknown.
+        """
+        with self._lock:
+            return self._values.get(field)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get every confirmed value.
+
+        Returns:
+            Dictionary of setting name to confirmed value.
+        """
+        with self._lock:
+            return dict(self._values)
+
+    def _is_fresh(self, field: str) -> bool:
+        """Check whether a value is young enough to skip writes; the caller holds the lock."""
+        if field not in self._values:
+            return False
+        max_age = self.max_age.get(field)
+        return max_age is None or time.monotonic() - self._updated[field] <= max_age
+
+    def confirmed(self) -> Dict[str, Any]:
+        """Get the values still fresh enough to skip writes.
+
+        Returns:
+            Dictionary of setting name to confirmed value, without values
+            older than their maximum age.
+        """
+        with self._lock:
+            return {field: value for field, value in self._values.items() if self._is_fresh(field)}
+
+    def is_confirmed(self, field: str, value: Any) -> bool:
+        """Check whether a write of value would be skipped, without counting it.
+
+        Args:
+            field: The setting name.
+            value: The target value.
+
+        Returns:
+            True if the value is confirmed and still fresh.
+        """
+        with self._lock:
+            return self._is_fresh(field) and self._values[field] == value
+
+    def should_write(self, field: str, value: Any, force: bool = False) -> bool:
+        """Decide whether a write is needed, counting it as elided if not.
+
+        Args:
+            field: The setting name.
+            value: The target value.
+            force: Write even if the value is already confirmed.
+
+        Returns:
+            True if the write must be sent to the device.
+        """
+        with self._lock:
+            if not force and self._is_fresh(field) and self._values[field] == value:
+                self._elided += 1
+                return False
+            return True
+
+    def confirm(self, field: str, value: Any) -> None:
+        """Record a value the device acknowledged writing.
+
+        Args:
+            field: The setting name.
+            value: The value written.
+        """
+        with self._lock:
+            changed = self._values.get(field) != value
+            self._values[field] = value
+            self._updated[field] = time.monotonic()
+            self._written += 1
+        if changed:
+            self._notify(field, value)
+
+    def observe(self, field: str, value: Any) -> None:
+        """Record a value read back from the device.
+
+        A read that disagrees with the confirmed value replaces it and is
+        counted as a mismatch.
+
+        Args:
+            field: The setting name.
+            value: The value read.
+        """
+        with self._lock:
+            changed = self._values.get(field) != value
+            if changed and field in self._values:
+                self._mismatches += 1
+            self._values[field] = value
+            self._updated[field] = time.monotonic()
+        if changed:
+            self._notify(field, value)
+
+    def _notify(self, field: str, value: Any) -> None:
+        """Tell listeners watching a field about its new value."""
+        for listener, fields in list(self._listeners):
+            if fields is not None and field not in fields:
+                continue
+            try:
+                listener(field, value)
+            except Exception:
+                logging.exception("State listener failed")
+
+    def invalidate(self, field: Optional[str] = None) -> None:
+        """Forget confirmed values so the next write is always sent.
+
+        Args:
+            field: The setting to forget, or None for all of them.
+        """
+        with self._lock:
+            if field is None:
+                self._values.clear()
+                self._updated.clear()
+            else:
+                self._values.pop(field, None)
+                self._updated.pop(field, None)
+            self._invalidations += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Get write elision statistics.
+
+        Returns:
+            Dictionary with written, elided, mismatch and invalidation counts.
+        """
+        with self._lock:
+            return {
+                'written': self._written,
+                'elided': self._elided,
+                'mismatches': self._mismatches,
+                'invalidations': self._invalidations
+            }
@@ -0,0 +1,144 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, Tuple
+from device.config import AppConfig
+
+
+class RateLimitFilter(logging.Filter):
+    """Drops records repeating the same message template too often.
+
+    Records are grouped by logger, level and unformatted message, so
+    per-transfer messages with different arguments count as repeats. Up to
+    burst records per group pass in each interval; the number dropped is
+    appended to the first record let through afterwards.
+    """
+
+    def __init__(self, burst: int, interval: float) -> None:
+        """Initialize the filter.
+
+        Args:
+            burst: Records per message template allowed in each interval.
+            interval: Length of the rate-limiting window in seconds.
+        """
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self._lock = threading.Lock()
+        # Key -> [window start, records passed, records dropped]
+        self._windows: Dict[Tuple[str, int, str], List[float]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Decide whether a record passes.
+
+        Args:
+            record: The log record.
+
+        Returns:
+            True if the record should be logged.
+        """
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                dropped = int(window[2]) if window is not None else 0
+                self._windows[key] = [now, 1, 0]
+                if len(self._windows) > 1000:
+                    self._prune(now)
+            elif window[1] < self.burst:
+                window[1] += 1
+                dropped = 0
+            else:
+                window[2] += 1
+                return False
+        if dropped:
+            record.msg = f"{record.msg} ({dropped} similar messages suppressed)"
+        return True
+
+    def _prune(self, now: float) -> None:
+        """Forget windows that have expired without dropping anything."""
+        for key, window in list(self._windows.items()):
+            if now - window[0] >= self.interval and not window[2]:
+                del self._windows[key]
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queues records without formatting them on the calling thread.
+
+    The standard QueueHandler formats every record before queueing it so it
+    can cross process boundaries; within one process the listener thread
+    can do that work instead.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Pass the record through untouched."""
+        return record
+
+
+def build_handlers(config: AppConfig, use_file: bool = True) -> List[logging.Handler]:
+    """Create the handlers that write log records.
+
+    Args:
+        config: Application configuration instance.
+        use_file: Whether to write the configured LOG_FILE.
+
+    Returns:
+        A stream handler and, if configured, a rotating file handler.
+    """
+    log_config = config.logging
+    handlers: List[logging.Handler] = [logging.StreamHandler()]
+
+    if use_file and log_config.LOG_FILE:
+        # Expand ~ in log file path
+        log_file_path = os.path.expanduser(log_config.LOG_FILE)
+        # Create log directory if it doesn't exist
+        log_dir = os.path.dirname(log_file_path)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+        handlers.append(logging.handlers.RotatingFileHandler(
+            log_file_path,
+            maxBytes=log_config.LOG_MAX_BYTES,
+            backupCount=log_config.LOG_BACKUP_COUNT
+        ))
+
+    formatter = logging.Formatter(log_config.LOG_FORMAT)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+def setup_logging(config: AppConfig, use_file: bool = True) -> logging.handlers.QueueListener:
+    """Set up logging so that formatting and disk writes happen off the caller's thread.
+
+    Records are put on a queue by the root logger and written by a
+    QueueListener thread, which is stopped (flushing the queue) at exit.
+
+    Args:
+        config: Application configuration instance.
+        use_file: Whether to write the configured LOG_FILE.
+
+    Returns:
+        The running queue listener.
+    """
+    log_config = config.logging
+    log_queue: 'queue.Queue[logging.LogRecord]' = queue.Queue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    if log_config.LOG_RATE_LIMIT > 0:
+        queue_handler.addFilter(RateLimitFilter(log_config.LOG_RATE_LIMIT, log_config.LOG_RATE_INTERVAL))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(getattr(logging, log_config.LOG_LEVEL))
+
+    listener = logging.handlers.QueueListener(log_queue, *build_handlers(config, use_file))
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
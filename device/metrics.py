@@ -0,0 +1,219 @@
+import bisect
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of transfer latencies."""
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS_MS) -> None:
+        """Initialize the histogram.
+
+        Args:
+            bounds: Ascending bucket upper bounds in milliseconds; one more
+                bucket collects everything above the last bound.
+        """
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def add(self, latency_ms: float) -> None:
+        """Record one sample.
+
+        Args:
+            latency_ms: The latency in milliseconds.
+        """
+        self.counts[bisect.bisect_left(self.bounds, latency_ms)] += 1
+        self.total += latency_ms
+        if latency_ms > self.maximum:
+            self.maximum = latency_ms
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Estimate a percentile as the upper bound of the bucket holding it.
+
+        Args:
+            fraction: The percentile as a fraction, e.g. 0.99.
+
+        Returns:
+            The estimate in milliseconds, or None without samples.
+        """
+        samples = sum(self.counts)
+        if not samples:
+            return None
+        rank = fraction * samples
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(self.bounds[index], self.maximum) if index < len(self.bounds) else self.maximum
+        return self.maximum
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the histogram as plain data.
+
+        Returns:
+            Dictionary with bucket counts keyed by upper bound, and summary values.
+        """
+        samples = sum(self.counts)
+        buckets = {f"<={bound:g}ms": count for bound, count in zip(self.bounds, self.counts)}
+        buckets[f">{self.bounds[-1]:g}ms"] = self.counts[-1]
+        return {
+            'count': samples,
+            'mean_ms': self.total / samples if samples else None,
+            'p50_ms': self.percentile(0.50),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': self.maximum,
+            'buckets': buckets
+        }
+
+
+class TransferMetrics:
+    """Counts and times control transfers per opcode and direction.
+
+    Time spent waiting on the pacer is recorded separately from time spent
+    inside ctrl_transfer, and so is time spent waiting for another thread's
+    transfers to finish. A summary line is logged at most every
+    log_interval seconds, from whichever thread records a transfer.
+    """
+
+    def __init__(self, log_interval: float = 0.0) -> None:
+        """Initialize the metrics.
+
+        Args:
+            log_interval: Seconds between summary log lines; 0 disables them.
+        """
+        self.log_interval = log_interval
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._last_log = self._started
+        self._counts: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock_waits = LatencyHistogram()
+        self._retries = 0
+        self._transfers = 0
+        self._sleep_time = 0.0
+        self._transfer_time = 0.0
+
+    def record(
+        self,
+        direction: str,
+        opcode: Optional[int],
+        slept: float,
+        elapsed: float,
+        error: Optional[str] = None
+    ) -> None:
+        """Record one control transfer.
+
+        Args:
+            direction: "out" or "in".
+            opcode: The protocol opcode the transfer belongs to.
+            slept: Seconds spent waiting for the pacer beforehand.
+            elapsed: Seconds spent in ctrl_transfer.
+            error: Short error name if the transfer failed.
+        """
+        key = f"{direction}:{opcode:#04x}" if opcode is not None else f"{direction}:?"
+        with self._lock:
+            self._transfers += 1
+            self._counts[key] = self._counts.get(key, 0) + 1
+            self._sleep_time += slept
+            self._transfer_time += elapsed
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram()
+            histogram.add(elapsed * 1000)
+            if error is not None:
+                self._errors[error] = self._errors.get(error, 0) + 1
+            due = self.log_interval > 0 and time.monotonic() - self._last_log >= self.log_interval
+            if due:
+                self._last_log = time.monotonic()
+        if due:
+            self.log_summary()
+
+    def record_retry(self) -> None:
+        """Record that a failed transfer is being retried."""
+        with self._lock:
+            self._retries += 1
+
+    def record_lock_wait(self, waited: float) -> None:
+        """Record time spent waiting for the device's transport lock.
+
+        Args:
+            waited: Seconds the caller waited.
+        """
+        with self._lock:
+            self._lock_waits.add(waited * 1000)
+
+    def summary(self) -> str:
+        """Build a one-line summary of the metrics.
+
+        Returns:
+            Human-readable summary.
+        """
+        with self._lock:
+            counts = ', '.join(f"{key}={count}" for key, count in sorted(self._counts.items()))
+            errors = sum(self._errors.values())
+            return (
+                f"{self._transfers} transfers ({counts or 'none'}), "
+                f"{self._transfer_time * 1000:.1f} ms in ctrl_transfer, "
+                f"{self._sleep_time * 1000:.1f} ms pacing, "
+                f"{self._lock_waits.total:.1f} ms waiting for the lock, "
+                f"{errors} errors, {self._retries} retries"
+            )
+
+    def log_summary(self) -> None:
+        """Log the summary line."""
+        logging.info("Transfer metrics: %s", self.summary())
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get all metrics as plain data.
+
+        Returns:
+            Dictionary with per-key counts, latency histograms, time split,
+            lock waits and error/retry counters.
+        """
+        with self._lock:
+            return {
+                'uptime': time.monotonic() - self._started,
+                'transfers': self._transfers,
+                'by_command': dict(self._counts),
+                'sleep_time': self._sleep_time,
+                'transfer_time': self._transfer_time,
+                'errors': dict(self._errors),
+                'retries': self._retries,
+                'latency': {key: histogram.snapshot() for key, histogram in self._histograms.items()},
+                'lock_wait': self._lock_waits.snapshot()
+            }
+
+    def reset(self) -> None:
+        """Clear every counter."""
+        with self._lock:
+            self._started = self._last_log = time.monotonic()
+            self._counts.clear()
+            self._errors.clear()
+            self._histograms.clear()
+            self._lock_waits = LatencyHistogram()
+            self._retries = 0
+            self._transfers = 0
+            self._sleep_time = 0.0
+            self._transfer_time = 0.0
+
+
+def error_name(error: BaseException) -> str:
+    """Get a short name for a transfer error, used as a metrics key.
+
+    Args:
+        error: The exception raised by ctrl_transfer.
+
+    Returns:
+        The libusb error code if known, otherwise the exception class name.
+    """
+    code = getattr(error, 'backend_error_code', None)
+    return f"libusb{code}" if code is not None else type(error).__name__
+
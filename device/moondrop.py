@@ -1,38 +1,175 @@
-import usb.core
+import os
+import random
 import time
+import usb.core
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Callable, ContextManager, Iterable, Optional, List, Mapping, NoReturn
 from device.get_methods import GetMethods
 from device.set_methods import SetMethods
 from device.config import AppConfig
+from device.state import DeviceState, ApplyResult
+from device.pacing import TransferPacer
+from device.known_state import KnownStateCache
+from device.connection import ConnectionManager, device_path, is_disconnect_error
+from device.errors import DeviceDisconnectedError, DeviceWedgedError
+from device.breaker import CircuitBreaker
+from device.backend import find_devices
+from device.metrics import TransferMetrics, error_name
+from device.poller import StatePoller
+from device.transport import TransportLock
+from device.capture import CAPTURE_ENV_VAR, TransferRecorder
+import device.protocol as protocol
 
 
 class Moondrop:
     """Main class for interacting with the Moondrop Dawn Pro device."""
 
-    def __init__(self, config: AppConfig) -> None:
+    def __init__(
+        self,
+        config: AppConfig,
+        usb_device: Optional[Any] = None,
+        identifier: Optional[str] = None
+    ) -> None:
         """Initialize the Moondrop device connection and settings.
 
         Args:
             config: Application configuration instance.
+            usb_device: An already enumerated pyusb device. The first
+                matching device on the bus is used when omitted.
+            identifier: Stable identifier (serial or bus/port path) of the device.
         """
         self.volume = 0
         self.led_status = config.device_constants.LED_STATUS_OFF
         self.current_filter = 'low'
         self.current_gain = 'low'
-        self.device = usb.core.find(
-            idVendor=config.device_identifiers.MOONDROP_VID,
-            idProduct=config.device_identifiers.DAWN_PRO_PID
+        self.state_ttl = config.transport.STATE_TTL
+        self._state: Optional[DeviceState] = None
+        self.known_state = KnownStateCache({'volume': config.transport.VOLUME_CONFIRM_MAX_AGE})
+        self.pacer = TransferPacer(
+            config.transport.MIN_TRANSFER_GAP,
+            adaptive=config.transport.ADAPTIVE_PACING,
+            adaptive_floor=config.transport.ADAPTIVE_MIN_GAP
+        )
+        self.metrics: Optional[TransferMetrics] = None
+        if config.transport.METRICS_ENABLED:
+            self.metrics = TransferMetrics(config.transport.METRICS_LOG_INTERVAL)
+        self._last_opcode: Optional[int] = None
+        self.transport_lock = TransportLock(
+            on_wait=self.metrics.record_lock_wait if self.metrics is not None else None
         )
+        self.read_timeout = config.transport.READ_TIMEOUT_MS
+        self.write_timeout = config.transport.WRITE_TIMEOUT_MS
+        self.retry_attempts = config.transport.RETRY_ATTEMPTS
+        self.retry_backoff = config.transport.RETRY_BACKOFF
+        self.breaker = CircuitBreaker(config.transport.BREAKER_THRESHOLD, config.transport.BREAKER_COOLDOWN)
+        self.poller: Optional[StatePoller] = None
+        self.capture: Optional[TransferRecorder] = None
+        self.identifier = identifier
+        self.config = config
+        self.device = usb_device
+        if self.device is None:
+            found = find_devices(config)
+            self.device = found[0] if found else None
 
         if self.device is None:
             raise ValueError("Device not found")
+        self.path = device_path(self.device)
         logging.info("Device found and initialized.")
+        capture_path = os.environ.get(CAPTURE_ENV_VAR) or config.transport.CAPTURE_FILE
+        if capture_path:
+            try:
+                self.start_capture(capture_path)
+            except OSError as error:
+                logging.error("Failed to start capture: %s", error)
+
+        self.connection = ConnectionManager(
+            self._find_same_device,
+            self._replace_device,
+            presence_interval=config.transport.PRESENCE_CHECK_INTERVAL,
+            backoff_initial=config.transport.RECONNECT_BACKOFF_INITIAL,
+            backoff_max=config.transport.RECONNECT_BACKOFF_MAX,
+            probe=self._probe
+        )
+        if config.transport.PRESENCE_CHECK_INTERVAL > 0:
+            self.connection.start()
 
         self.constants = config.get_constants_dict()
+        # Transfer arguments resolved once instead of on every call
+        self._out = (
+            self.constants['BM_REQUEST_TYPE_OUT'], self.constants['B_REQUEST'],
+            self.constants['W_VALUE'], self.constants['W_INDEX']
+        )
+        self._in = (
+            self.constants['BM_REQUEST_TYPE_IN'], self.constants['B_REQUEST_GET'],
+            self.constants['W_VALUE'], self.constants['W_INDEX'], self.constants['DATA_LENGTH']
+        )
         self.getter = GetMethods(self, self.constants)
         self.setter = SetMethods(self, self.constants)
 
+    def transaction(self) -> ContextManager[None]:
+        """Hold the device's transport lock across several transfers.
+
+        No other thread's transfers run until the with block ends. The lock
+        is re-entrant, so queries and writes can be used inside it.
+
+        Returns:
+            Context manager holding the lock.
+        """
+        return self.transport_lock.hold()
+
+    def query(self, frame: bytes) -> List[int]:
+        """Send a query command and read its reply as one atomic unit.
+
+        The OUT and IN transfers run under the transport lock, so no other
+        thread's transfer can take the reply. Since queries are idempotent,
+        a failed read is retried by repeating the whole pair.
+
+        Args:
+            frame: The query frame, e.g. protocol.SETTINGS_QUERY_FRAME.
+
+        Returns:
+            The reply read from the device.
+
+        Raises:
+            IOError: If the query or its reply fails.
+        """
+        retries = self.retry_attempts if frame[2] in protocol.IDEMPOTENT_OPCODES else 0
+        with self.transport_lock.hold():
+            attempt = 0
+            while True:
+                self._send(*self._out, frame)
+                try:
+                    # Only the last attempt counts against the circuit breaker
+                    return self._send(*self._in, count_failure=attempt >= retries)
+                except (DeviceDisconnectedError, DeviceWedgedError):
+                    raise
+                except IOError as error:
+                    if attempt >= retries:
+                        raise
+                    attempt += 1
+                    if self.metrics is not None:
+                        self.metrics.record_retry()
+                    delay = self._retry_delay(attempt)
+                    logging.warning(
+                        "Query reply failed (%s); retry %d of %d in %.0f ms.",
+                        error, attempt, retries, delay * 1000
+                    )
+                    time.sleep(delay)
+
+    def write(self, frame: bytes) -> Any:
+        """Send a set or refresh command.
+
+        Args:
+            frame: The command frame.
+
+        Returns:
+            The number of bytes written.
+
+        Raises:
+            IOError: If the transfer fails.
+        """
+        return self.send_control_transfer(*self._out, frame)
+
     def send_control_transfer(
         self,
         bmRequestType: int,
@@ -43,6 +180,13 @@ class Moondrop:
     ) -> List[int]:
         """Send a control transfer to the USB device.
 
+        Transfers from different threads are serialized by the transport
+        lock; use query() for an OUT/IN pair. Reads use READ_TIMEOUT_MS and
+        writes WRITE_TIMEOUT_MS. Failed writes of idempotent commands are
+        retried up to RETRY_ATTEMPTS times with jittered exponential backoff;
+        reads are never retried on their own since the reply belongs to the
+        write before it.
+
         Args:
             bmRequestType: The request type.
             bRequest: The request number.
@@ -54,14 +198,295 @@ class Moondrop:
             The response data from the device.
 
         Raises:
+            DeviceDisconnectedError: If the device is unplugged.
+            DeviceWedgedError: If the device stopped responding and the
+                circuit breaker is open.
             IOError: If the USB control transfer fails.
         """
+        with self.transport_lock.hold():
+            return self._send(bmRequestType, bRequest, wValue, wIndex, data_or_length)
+
+    def _send(
+        self,
+        bmRequestType: int,
+        bRequest: int,
+        wValue: int,
+        wIndex: int,
+        data_or_length: List[int],
+        count_failure: bool = True
+    ) -> List[int]:
+        """Perform a control transfer with retries; the caller holds the lock.
+
+        A transfer that still fails after its retries counts as one failure
+        for the circuit breaker, unless count_failure is False because the
+        caller retries it again itself.
+        """
+        self.connection.check()
+        self.breaker.check()
+        if bmRequestType & 0x80:
+            timeout, retries = self.read_timeout, 0
+        else:
+            timeout = self.write_timeout
+            opcode = data_or_length[2] if len(data_or_length) > 2 else None
+            retries = self.retry_attempts if opcode in protocol.IDEMPOTENT_OPCODES else 0
+        attempt = 0
+        while True:
+            try:
+                if self.metrics is None and self.capture is None:
+                    self.pacer.wait()
+                    response = self.device.ctrl_transfer(
+                        bmRequestType, bRequest, wValue, wIndex, data_or_length, timeout
+                    )
+                else:
+                    response = self._measured_transfer(
+                        bmRequestType, bRequest, wValue, wIndex, data_or_length, timeout
+                    )
+            except usb.core.USBError as error:
+                if attempt >= retries or is_disconnect_error(error):
+                    self._transfer_failed(error, count_failure)
+                attempt += 1
+                self._before_retry(error, attempt, retries)
+                continue
+            self.pacer.record(True)
+            self.breaker.record(True)
+            return response
+
+    def _measured_transfer(
+        self,
+        bmRequestType: int,
+        bRequest: int,
+        wValue: int,
+        wIndex: int,
+        data_or_length: List[int],
+        timeout: int
+    ) -> List[int]:
+        """Perform a control transfer while recording it in the metrics and capture."""
+        if bmRequestType & 0x80:
+            direction = 'in'
+            opcode = self._last_opcode
+        else:
+            direction = 'out'
+            opcode = data_or_length[2] if len(data_or_length) > 2 else None
+            self._last_opcode = opcode
+        slept = self.pacer.wait()
+        started = time.perf_counter()
         try:
-            time.sleep(0.1)
-            return self.device.ctrl_transfer(bmRequestType, bRequest, wValue, wIndex, data_or_length)
+            response = self.device.ctrl_transfer(bmRequestType, bRequest, wValue, wIndex, data_or_length, timeout)
         except usb.core.USBError as error:
-            logging.error(f"USB control transfer failed: {error}")
-            raise IOError(f"USB control transfer failed: {error}") from error
+            elapsed = time.perf_counter() - started
+            if self.metrics is not None:
+                self.metrics.record(direction, opcode, slept, elapsed, error_name(error))
+            if self.capture is not None:
+                self.capture.record(
+                    bmRequestType, bRequest, wValue, wIndex, data_or_length, None, elapsed, slept, error
+                )
+            raise
+        elapsed = time.perf_counter() - started
+        if self.metrics is not None:
+            self.metrics.record(direction, opcode, slept, elapsed)
+        if self.capture is not None:
+            self.capture.record(bmRequestType, bRequest, wValue, wIndex, data_or_length, response, elapsed, slept)
+        return response
+
+    def _before_retry(self, error: usb.core.USBError, attempt: int, retries: int) -> None:
+        """Record a failed attempt and wait before the next one.
+
+        Attempts that are retried don't count against the circuit breaker;
+        only the command's final failure does.
+        """
+        self.pacer.record(False)
+        if self.metrics is not None:
+            self.metrics.record_retry()
+        delay = self._retry_delay(attempt)
+        logging.warning(
+            "USB control transfer failed (%s); retry %d of %d in %.0f ms.",
+            error, attempt, retries, delay * 1000
+        )
+        time.sleep(delay)
+
+    def _retry_delay(self, attempt: int) -> float:
+        """Get the jittered exponential backoff before a retry.
+
+        Args:
+            attempt: The retry number, starting at 1.
+
+        Returns:
+            Seconds to wait.
+        """
+        return self.retry_backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+
+    def _transfer_failed(self, error: usb.core.USBError, count_failure: bool = True) -> NoReturn:
+        """Record a failed transfer and raise the matching IOError.
+
+        Args:
+            error: The error of the last attempt.
+            count_failure: Count the failure against the circuit breaker.
+
+        Raises:
+            DeviceDisconnectedError: If the device was unplugged.
+            IOError: For any other transfer failure.
+        """
+        self.pacer.record(False)
+        if is_disconnect_error(error):
+            self.connection.mark_disconnected()
+            raise DeviceDisconnectedError(f"Device disconnected: {error}") from error
+        if count_failure:
+            self.breaker.record(False)
+        logging.error("USB control transfer failed: %s", error)
+        raise IOError(f"USB control transfer failed: {error}") from error
+
+    @property
+    def is_connected(self) -> bool:
+        """Whether the device is currently attached."""
+        return self.connection.connected
+
+    @property
+    def is_wedged(self) -> bool:
+        """Whether transfers are failing fast because the device stopped responding."""
+        return self.breaker.is_open
+
+    def close(self) -> None:
+        """Stop background connection monitoring, polling and capturing."""
+        self.connection.stop()
+        if self.poller is not None:
+            self.poller.stop()
+        self.stop_capture()
+
+    def start_capture(self, path: str) -> TransferRecorder:
+        """Record every control transfer to a capture file.
+
+        Args:
+            path: File to write; "{device}" is replaced by the device's
+                identifier (or port path), so several devices can be
+                captured at once.
+
+        Returns:
+            The recorder, replacing any capture already running.
+
+        Raises:
+            OSError: If the file can't be created.
+        """
+        device = self.identifier or self.path
+        with self.transport_lock.hold():
+            self.stop_capture()
+            self.capture = TransferRecorder(path.replace('{device}', device), device)
+        logging.info("Capturing control transfers to %s", self.capture.path)
+        return self.capture
+
+    def stop_capture(self) -> None:
+        """Stop recording control transfers and close the capture file."""
+        with self.transport_lock.hold():
+            capture, self.capture = self.capture, None
+        if capture is not None:
+            capture.close()
+            logging.info("Captured %d control transfers to %s", capture.records, capture.path)
+
+    def subscribe(
+        self,
+        listener: Callable[[str, Any], None],
+        fields: Optional[Iterable[str]] = None
+    ) -> None:
+        """Get notified when a device setting changes.
+
+        Listeners are only called when a value differs from the last one
+        confirmed by a write or read, whichever thread noticed it.
+
+        Args:
+            listener: Called with the field name ("volume", "gain",
+                "filter_type" or "led_status") and its new value.
+            fields: Fields to watch; all of them when omitted.
+        """
+        self.known_state.add_listener(listener, fields)
+
+    def unsubscribe(self, listener: Callable[[str, Any], None]) -> None:
+        """Stop notifying a listener passed to subscribe().
+
+        Args:
+            listener: The listener to remove.
+        """
+        self.known_state.remove_listener(listener)
+
+    def start_polling(self, run: Optional[Callable[[Callable[[], Any]], Any]] = None) -> StatePoller:
+        """Start polling the volume so hardware knob changes reach subscribers.
+
+        Args:
+            run: Executes one poll, e.g. by routing it through a DeviceWorker
+                so polls never overlap other commands. Polls run on the
+                poller thread when omitted.
+
+        Returns:
+            The running poller.
+        """
+        if self.poller is None:
+            transport = self.config.transport
+            self.poller = StatePoller(
+                self.get_current_volume,
+                transport.POLL_INTERVAL_MIN,
+                transport.POLL_INTERVAL_MAX,
+                run=run,
+                is_connected=lambda: self.is_connected
+            )
+            self.subscribe(self.poller.on_change)
+            self.connection.add_listener(lambda connected: self.poller.poke())
+            self.poller.start()
+        return self.poller
+
+    def _find_same_device(self) -> Optional[Any]:
+        """Look for this device on the bus by its port path."""
+        found = find_devices(
+            self.config,
+            custom_match=lambda candidate: device_path(candidate) == self.path
+        )
+        return found[0] if found else None
+
+    def _probe(self) -> None:
+        """Check that the held handle still reaches the device.
+
+        Asking for the active configuration costs one request instead of
+        enumerating the whole bus.
+
+        Raises:
+            usb.core.USBError: If the device is gone.
+        """
+        with self.transport_lock.hold():
+            self.device.get_active_configuration()
+
+    def _replace_device(self, usb_device: Any) -> None:
+        """Swap in the handle of a reconnected device and forget stale state."""
+        # No transfer may run while the handle is being swapped
+        with self.transport_lock.hold():
+            self.device = usb_device
+        self.breaker.reset()
+        self.invalidate_state()
+        self.known_state.invalidate()
+
+    def pacing_stats(self) -> Dict[str, Any]:
+        """Get transfer pacing statistics.
+
+        Returns:
+            Dictionary with the gap in use and wait counters.
+        """
+        return self.pacer.stats()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get every transport statistic in one place.
+
+        Returns:
+            Dictionary with pacing, write elision, connection, breaker and lock statistics,
+            plus transfer metrics and polling statistics when enabled.
+        """
+        stats = {
+            'pacing': self.pacer.stats(),
+            'writes': self.known_state.stats(),
+            'connection': self.connection.stats(),
+            'breaker': self.breaker.stats(),
+            'lock': self.transport_lock.stats()
+        }
+        if self.metrics is not None:
+            stats['transfers'] = self.metrics.snapshot()
+        if self.poller is not None:
+            stats['polling'] = self.poller.stats()
+        return stats
 
     def refresh_volume(self) -> Optional[List[int]]:
         """Refresh the volume settings.
@@ -71,16 +496,42 @@ class Moondrop:
         """
         return self.setter.refresh_volume()
 
-    def set_volume(self, volume: int) -> bool:
+    def set_volume(self, volume: int, force: bool = False) -> bool:
         """Set the device volume.
 
         Args:
             volume: The volume level to set (0-60).
+            force: Send the write even if the device already holds this value.
 
         Returns:
             True if successful, False otherwise.
         """
-        return self.setter.set_volume(volume)
+        return self.setter.set_volume(volume, force)
+
+    def get_state(self, max_age: Optional[float] = None) -> Optional[DeviceState]:
+        """Get a snapshot of every device setting.
+
+        A snapshot younger than max_age is reused; otherwise one settings
+        read and one volume read are performed.
+
+        Args:
+            max_age: Maximum snapshot age in seconds. Defaults to the
+                configured STATE_TTL; 0 always reads the device.
+
+        Returns:
+            The device state snapshot, or None if the read failed.
+        """
+        if max_age is None:
+            max_age = self.state_ttl
+        state = self._state
+        if state is not None and max_age > 0 and state.age() <= max_age:
+            return state
+        self._state = self.getter.read_state()
+        return self._state
+
+    def invalidate_state(self) -> None:
+        """Discard the cached state snapshot so the next read hits the device."""
+        self._state = None
 
     def get_current_volume(self) -> Optional[int]:
         """Get the current volume level.
@@ -114,36 +565,60 @@ class Moondrop:
         """
         return self.getter.get_filter()
 
-    def set_led_status(self, status: str) -> bool:
+    def set_led_status(self, status: str, force: bool = False) -> bool:
         """Set the LED status.
 
         Args:
             status: The LED status to set.
+            force: Send the write even if the device already holds this value.
 
         Returns:
             True if successful, False otherwise.
         """
-        return self.setter.set_led_status(status)
+        return self.setter.set_led_status(status, force)
 
-    def set_filter(self, filter_type: str) -> bool:
+    def set_filter(self, filter_type: str, force: bool = False) -> bool:
         """Set the filter type.
 
         Args:
             filter_type: The filter type to set.
+            force: Send the write even if the device already holds this value.
 
         Returns:
             True if successful, False otherwise.
         """
-        return self.setter.set_filter(filter_type)
+        return self.setter.set_filter(filter_type, force)
 
-    def set_gain(self, status: str) -> bool:
+    def set_gain(self, status: str, force: bool = False) -> bool:
         """Set the gain setting.
 
         Args:
             status: The gain setting to set.
+            force: Send the write even if the device already holds this value.
 
         Returns:
             True if successful, False otherwise.
         """
-        return self.setter.set_gain(status)
+        return self.setter.set_gain(status, force)
+
+    def apply(self, settings: Mapping[str, Any], force: bool = False) -> ApplyResult:
+        """Apply several settings as one batch with a single volume refresh.
+
+        Args:
+            settings: Mapping of "volume", "gain", "filter_type" and/or
+                "led_status" to target values.
+            force: Send every write even if the device already holds the value.
+
+        Returns:
+            ApplyResult with per-field success.
+        """
+        return self.setter.apply(settings, force)
+
+    def write_stats(self) -> Dict[str, int]:
+        """Get write elision statistics.
+
+        Returns:
+            Dictionary with written, elided, mismatch and invalidation counts.
+        """
+        return self.known_state.stats()
 
@@ -0,0 +1,108 @@
+import time
+import logging
+from typing import Dict, Any
+
+
+class TransferPacer:
+    """Enforces a minimum gap between consecutive control transfers.
+
+    Only the part of the gap that has not already elapsed since the last
+    transfer completed is slept. In adaptive mode the gap shrinks while the
+    device keeps up and grows back after a failure, converging on the
+    shortest gap the device tolerates.
+    """
+
+    def __init__(
+        self,
+        min_gap: float,
+        adaptive: bool = False,
+        adaptive_floor: float = 0.0,
+        shrink_factor: float = 0.8,
+        success_window: int = 10
+    ) -> None:
+        """Initialize the pacer.
+
+        Args:
+            min_gap: Configured gap in seconds; the ceiling in adaptive mode.
+            adaptive: Whether to learn the shortest tolerated gap.
+            adaptive_floor: Lowest gap adaptive mode will try.
+            shrink_factor: Multiplier applied to the gap when shrinking it.
+            success_window: Consecutive successes required before shrinking.
+        """
+        self.min_gap = min_gap
+        self.adaptive = adaptive
+        self.adaptive_floor = min(adaptive_floor, min_gap)
+        self.shrink_factor = shrink_factor
+        self.success_window = success_window
+        self.gap = min_gap
+        self._tolerated_floor = self.adaptive_floor
+        self._last_completed = 0.0
+        self._streak = 0
+        self._waits = 0
+        self._total_wait = 0.0
+        self._transfers = 0
+        self._failures = 0
+
+    def delay(self) -> float:
+        """Get the time still to wait before the next transfer may start.
+
+        Returns:
+            Remaining gap in seconds, 0 if the gap has already elapsed.
+        """
+        return max(0.0, self._last_completed + self.gap - time.monotonic())
+
+    def wait(self) -> float:
+        """Sleep for whatever part of the gap is left.
+
+        Returns:
+            The number of seconds slept.
+        """
+        remaining = self.delay()
+        if remaining > 0:
+            time.sleep(remaining)
+            self._waits += 1
+            self._total_wait += remaining
+        return remaining
+
+    def record(self, success: bool) -> None:
+        """Record the completion of a transfer.
+
+        Args:
+            success: Whether the transfer succeeded.
+        """
+        self._last_completed = time.monotonic()
+        self._transfers += 1
+        if success:
+            self._streak += 1
+            if self.adaptive and self._streak >= self.success_window:
+                self._streak = 0
+                self.gap = max(self._tolerated_floor, self.gap * self.shrink_factor)
+            return
+
+        self._failures += 1
+        self._streak = 0
+        if self.adaptive and self.gap < self.min_gap:
+            # The failing gap is too short; never go below one step above it.
+            self._tolerated_floor = min(self.min_gap, self.gap / self.shrink_factor)
+            self.gap = self.min_gap
+            logging.info(
+                "Transfer pacing backed off to %.1f ms (floor %.1f ms).",
+                self.gap * 1000, self._tolerated_floor * 1000
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        """Get pacing statistics.
+
+        Returns:
+            Dictionary with the gap in use and wait/transfer counters.
+        """
+        return {
+            'gap': self.gap,
+            'min_gap': self.min_gap,
+            'adaptive': self.adaptive,
+            'tolerated_floor': self._tolerated_floor,
+            'transfers': self._transfers,
+            'failures': self._failures,
+            'waits': self._waits,
+            'total_wait': self._total_wait
+        }
@@ -0,0 +1,114 @@
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+class StatePoller:
+    """Polls the device volume in the background to catch hardware knob changes.
+
+    Only the volume query is used, which is two transfers instead of the
+    four of a full state read. The interval starts at min_interval after any
+    activity (a changed value or an explicit poke) and grows by backoff
+    after every quiet poll, up to max_interval. Changes are reported
+    through the device's state listeners, not by the poller itself.
+    """
+
+    def __init__(
+        self,
+        poll: Callable[[], Any],
+        min_interval: float,
+        max_interval: float,
+        backoff: float = 2.0,
+        run: Optional[Callable[[Callable[[], Any]], Any]] = None,
+        is_connected: Optional[Callable[[], bool]] = None
+    ) -> None:
+        """Initialize the poller.
+
+        Args:
+            poll: Reads the value to watch, e.g. Moondrop.get_current_volume.
+            min_interval: Seconds between polls right after activity.
+            max_interval: Longest seconds between polls when idle.
+            backoff: Factor the interval grows by after a quiet poll.
+            run: Executes one poll and returns its result, e.g. by routing it
+                through a DeviceWorker. The poll runs on the poller thread
+                when omitted.
+            is_connected: Polls are skipped while this returns False.
+        """
+        self.poll = poll
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.backoff = backoff
+        self.run = run
+        self.is_connected = is_connected
+        self.interval = min_interval
+        self._active = False
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._polls = 0
+        self._changes = 0
+
+    def start(self) -> None:
+        """Start the poller thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="dawnpro-poller", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the poller thread."""
+        self._stop.set()
+        self._wake.set()
+
+    def poke(self) -> None:
+        """Record activity so the next polls come quickly."""
+        self._active = True
+        self._wake.set()
+
+    def on_change(self, field: str, value: Any) -> None:
+        """State listener that counts a change as activity.
+
+        Args:
+            field: The setting that changed.
+            value: Its new value.
+        """
+        self._changes += 1
+        self.poke()
+
+    def _loop(self) -> None:
+        """Poll until stopped, adapting the interval to activity."""
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            if self._active:
+                # Let the activity settle, then poll at the fast rate again
+                self._active = False
+                self.interval = self.min_interval
+                continue
+            if self.is_connected is not None and not self.is_connected():
+                self.interval = self.max_interval
+                continue
+            try:
+                if self.run is None:
+                    self.poll()
+                else:
+                    self.run(self.poll)
+            except Exception:
+                logging.exception("State poll failed")
+            self._polls += 1
+            if self._active:
+                # The poll itself found a change; don't treat its poke as a wakeup
+                self._active = False
+                self._wake.clear()
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.max_interval, self.interval * self.backoff)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get polling statistics.
+
+        Returns:
+            Dictionary with the current interval, poll count and changes seen.
+        """
+        return {'interval': self.interval, 'polls': self._polls, 'changes': self._changes}
@@ -0,0 +1,99 @@
+"""Named presets of device settings stored in the configuration.
+
+A preset maps any of "volume", "gain", "filter_type" and "led_status" to a
+target value; fields it leaves out are not touched when it is applied.
+Applying goes through Moondrop.apply, which compares every field with the
+last known device state and only writes the ones that differ.
+"""
+from typing import Any, Dict, List, Mapping, Optional
+from device.config import AppConfig
+import device.protocol as protocol
+
+
+def preset_names(config: AppConfig) -> List[str]:
+    """Get the names of the configured presets.
+
+    Args:
+        config: Application configuration instance.
+
+    Returns:
+        Preset names in alphabetical order.
+    """
+    return sorted(config.presets)
+
+
+def get_preset(config: AppConfig, name: str) -> Dict[str, Any]:
+    """Look up a preset.
+
+    Args:
+        config: Application configuration instance.
+        name: The preset name.
+
+    Returns:
+        A copy of the preset's settings mapping.
+
+    Raises:
+        ValueError: If no preset has this name or it holds invalid values.
+    """
+    settings = config.presets.get(name)
+    if settings is None:
+        raise ValueError(f"Unknown preset: {name}")
+    protocol.validate_settings(settings)
+    return {field: value for field, value in settings.items() if value is not None}
+
+
+def save_preset(config: AppConfig, name: str, settings: Mapping[str, Any]) -> Dict[str, Any]:
+    """Add or replace a preset.
+
+    The configuration is only changed in memory; saving it is up to the
+    caller.
+
+    Args:
+        config: Application configuration instance.
+        name: The preset name.
+        settings: Mapping of field name to target value; None values are
+            dropped.
+
+    Returns:
+        The stored settings mapping.
+
+    Raises:
+        ValueError: If the name is empty or the settings are empty or invalid.
+    """
+    if not name or not name.strip():
+        raise ValueError("Preset name must not be empty")
+    protocol.validate_settings(settings)
+    stored = {field: value for field, value in settings.items() if value is not None}
+    if not stored:
+        raise ValueError("Preset must contain at least one setting")
+    config.presets[name.strip()] = stored
+    return dict(stored)
+
+
+def delete_preset(config: AppConfig, name: str) -> bool:
+    """Remove a preset.
+
+    Args:
+        config: Application configuration instance.
+        name: The preset name.
+
+    Returns:
+        True if the preset existed.
+    """
+    return config.presets.pop(name, None) is not None
+
+
+def preset_diff(settings: Mapping[str, Any], known: Mapping[str, Optional[Any]]) -> Dict[str, Any]:
+    """Get the fields of a preset that differ from the known device state.
+
+    Args:
+        settings: The preset's settings mapping.
+        known: Last known value per field; None where unknown.
+
+    Returns:
+        Mapping of the fields that would be written to their target values.
+    """
+    return {
+        field: value for field, value in settings.items()
+        if value is not None and known.get(field) != value
+    }
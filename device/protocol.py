@@ -0,0 +1,229 @@
+from types import MappingProxyType
+from typing import Any, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+# Every frame starts with this two-byte header
+HEADER: Tuple[int, int] = (0xC0, 0xA5)
+
+# Opcodes, the third byte of a frame
+SETTINGS_QUERY = 0xA3
+VOLUME_QUERY = 0xA2
+SET_FILTER = 1
+SET_GAIN = 2
+SET_VOLUME = 4
+SET_LED = 6
+
+# Commands that set an absolute value or start a query, so sending one
+# twice leaves the device as sending it once would
+IDEMPOTENT_OPCODES = frozenset({SETTINGS_QUERY, VOLUME_QUERY, SET_FILTER, SET_GAIN, SET_VOLUME, SET_LED})
+
+# Raw volume byte for each volume step; the index is the step (0-60)
+VOLUME_TABLE: Tuple[int, ...] = (
+    0xFF, 0xC8, 0xB4, 0xAA, 0xA0, 0x96, 0x8C, 0x82, 0x7A, 0x74,
+    0x6E, 0x6A, 0x66, 0x62, 0x5E, 0x5A, 0x58, 0x56, 0x54, 0x52,
+    0x50, 0x4E, 0x4C, 0x4A, 0x48, 0x46, 0x44, 0x42, 0x40, 0x3E,
+    0x3C, 0x3A, 0x38, 0x36, 0x34, 0x32, 0x30, 0x2E, 0x2C, 0x2A,
+    0x28, 0x26, 0x24, 0x22, 0x20, 0x1E, 0x1C, 0x1A, 0x18, 0x16,
+    0x14, 0x12, 0x10, 0x0E, 0x0C, 0x0A, 0x08, 0x06, 0x04, 0x02,
+    0x00
+)
+
+# Names in payload order; the index is the payload byte
+GAIN_NAMES: Tuple[str, ...] = ("Low", "High")
+FILTER_NAMES: Tuple[str, ...] = (
+    "Fast Roll-Off Low Latency",
+    "Fast Roll-Off Phase Compensated",
+    "Slow Roll-Off Low Latency",
+    "Slow Roll-Off Phase Compensated",
+    "Non-Oversampling"
+)
+LED_NAMES: Tuple[str, ...] = ("On", "Temporarily Off", "Off")
+
+INVALID_GAIN = "Invalid Gain Value"
+INVALID_FILTER = "Invalid Filter Value"
+INVALID_LED_STATUS = "Invalid LED Status"
+
+VOLUME_PERCENT: Mapping[int, int] = MappingProxyType({raw: step for step, raw in enumerate(VOLUME_TABLE)})
+GAIN_PAYLOADS: Mapping[str, int] = MappingProxyType({name: index for index, name in enumerate(GAIN_NAMES)})
+FILTER_PAYLOADS: Mapping[str, int] = MappingProxyType({name: index for index, name in enumerate(FILTER_NAMES)})
+LED_PAYLOADS: Mapping[str, int] = MappingProxyType({name: index for index, name in enumerate(LED_NAMES)})
+
+
+def encode(opcode: int, payload: Optional[int] = None) -> bytes:
+    """Build a frame.
+
+    Args:
+        opcode: The command opcode.
+        payload: The value byte, omitted for queries.
+
+    Returns:
+        The encoded frame.
+    """
+    if payload is None:
+        return bytes((HEADER[0], HEADER[1], opcode))
+    return bytes((HEADER[0], HEADER[1], opcode, payload))
+
+
+SETTINGS_QUERY_FRAME = encode(SETTINGS_QUERY)
+VOLUME_QUERY_FRAME = encode(VOLUME_QUERY)
+
+
+class Command(NamedTuple):
+    """A set command with its payload and pre-encoded frame for every value."""
+    field: str
+    opcode: int
+    payloads: Mapping[Any, int]
+    frames: Mapping[Any, bytes]
+
+    def accepts(self, value: Any) -> bool:
+        """Check whether a value can be encoded.
+
+        Args:
+            value: The setting value.
+
+        Returns:
+            True if the value has a frame.
+        """
+        if isinstance(value, bool):
+            return False
+        try:
+            return value in self.frames
+        except TypeError:
+            return False
+
+    def payload(self, value: Any) -> int:
+        """Get the payload byte for a value.
+
+        Args:
+            value: The setting value.
+
+        Returns:
+            The payload byte.
+
+        Raises:
+            ValueError: If the value can't be encoded.
+        """
+        if not self.accepts(value):
+            raise ValueError(f"Invalid {self.field}: {value!r}")
+        return self.payloads[value]
+
+    def frame(self, value: Any) -> bytes:
+        """Get the frame that writes a value.
+
+        Args:
+            value: The setting value.
+
+        Returns:
+            The pre-encoded frame.
+
+        Raises:
+            ValueError: If the value can't be encoded.
+        """
+        if not self.accepts(value):
+            raise ValueError(f"Invalid {self.field}: {value!r}")
+        return self.frames[value]
+
+
+def _command(field: str, opcode: int, payloads: Mapping[Any, int]) -> Command:
+    """Build a command with a frame for every payload."""
+    return Command(
+        field=field,
+        opcode=opcode,
+        payloads=payloads,
+        frames=MappingProxyType({value: encode(opcode, payload) for value, payload in payloads.items()})
+    )
+
+
+VOLUME = _command('volume', SET_VOLUME, MappingProxyType(dict(enumerate(VOLUME_TABLE))))
+GAIN = _command('gain', SET_GAIN, GAIN_PAYLOADS)
+FILTER = _command('filter_type', SET_FILTER, FILTER_PAYLOADS)
+LED = _command('led_status', SET_LED, LED_PAYLOADS)
+
+# Set commands keyed by the field names used in settings mappings
+COMMANDS: Mapping[str, Command] = MappingProxyType({
+    command.field: command for command in (VOLUME, GAIN, FILTER, LED)
+})
+
+
+def validate_settings(settings: Mapping[str, Any]) -> None:
+    """Reject values the device protocol can't encode.
+
+    Args:
+        settings: Mapping of field name to target value; None values are
+            ignored.
+
+    Raises:
+        ValueError: If a field or value is invalid.
+    """
+    for name, value in settings.items():
+        if value is None:
+            continue
+        if name == 'volume':
+            if not VOLUME.accepts(value):
+                raise ValueError(f"Invalid volume: {value!r} (expected 0-60)")
+        elif name in COMMANDS:
+            if not COMMANDS[name].accepts(value):
+                raise ValueError(f"Invalid {name}: {value!r}")
+        else:
+            raise ValueError(f"Unknown setting: {name}")
+
+
+def volume_percent(raw: int) -> int:
+    """Convert a raw volume byte to its step, 0 for bytes not in the table."""
+    return VOLUME_PERCENT.get(raw, 0)
+
+
+def gain_name(payload: int) -> str:
+    """Convert a gain payload to its name."""
+    return GAIN_NAMES[payload] if 0 <= payload < len(GAIN_NAMES) else INVALID_GAIN
+
+
+def filter_name(payload: int) -> str:
+    """Convert a filter payload to its name."""
+    return FILTER_NAMES[payload] if 0 <= payload < len(FILTER_NAMES) else INVALID_FILTER
+
+
+def led_name(payload: int) -> str:
+    """Convert an LED status payload to its name."""
+    return LED_NAMES[payload] if 0 <= payload < len(LED_NAMES) else INVALID_LED_STATUS
+
+
+class SettingsResponse(NamedTuple):
+    """Decoded reply to the settings query."""
+    filter_type: str
+    gain: str
+    led_status: str
+
+    @classmethod
+    def parse(cls, data: Sequence[int]) -> 'SettingsResponse':
+        """Decode the 7-byte settings reply.
+
+        Args:
+            data: The reply, where data[3] is the filter, data[4] the gain
+                and data[5] the LED status.
+
+        Returns:
+            The decoded settings.
+
+        Raises:
+            ValueError: If the reply is too short.
+        """
+        if len(data) < 6:
+            raise ValueError(f"Settings response too short: {list(data)}")
+        return cls(filter_name(data[3]), gain_name(data[4]), led_name(data[5]))
+
+
+def parse_volume(data: Sequence[int]) -> int:
+    """Decode the volume step from the reply to the volume query.
+
+    Args:
+        data: The reply, where data[4] is the raw volume.
+
+    Returns:
+        The volume step (0-60).
+
+    Raises:
+        ValueError: If the reply is too short.
+    """
+    if len(data) < 5:
+        raise ValueError(f"Volume response too short: {list(data)}")
+    return volume_percent(data[4])
@@ -0,0 +1,186 @@
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+import usb.core
+from device.config import AppConfig
+from device.moondrop import Moondrop
+from device.connection import device_path
+from device.backend import find_devices
+
+DEVICE_ENV_VAR = 'DAWNPRO_DEVICE'
+
+
+@dataclass(frozen=True)
+class DeviceInfo:
+    """Stable identifiers of one attached device."""
+    path: str
+    serial: Optional[str]
+    bus: int
+    address: int
+
+    def matches(self, identifier: str) -> bool:
+        """Check whether an identifier names this device.
+
+        Args:
+            identifier: A bus/port path such as "1-2.3" or a serial number.
+
+        Returns:
+            True if the identifier is this device's path or serial.
+        """
+        return identifier == self.path or (self.serial is not None and identifier == self.serial)
+
+
+def device_serial(usb_device: Any) -> Optional[str]:
+    """Read a USB device's serial number string.
+
+    Args:
+        usb_device: The pyusb device.
+
+    Returns:
+        The serial number, or None if the device has none or it can't be read.
+    """
+    try:
+        if not usb_device.iSerialNumber:
+            return None
+        # pyusb reads the string descriptor on first access and caches it
+        return usb_device.serial_number
+    except (usb.core.USBError, ValueError, NotImplementedError, AttributeError):
+        return None
+
+
+class DeviceRegistry:
+    """Enumerates every attached Dawn Pro and opens each one once."""
+
+    def __init__(self, config: AppConfig) -> None:
+        """Initialize the registry.
+
+        Args:
+            config: Application configuration instance.
+        """
+        self.config = config
+        self._lock = threading.Lock()
+        self._scanned = False
+        self._infos: Dict[str, DeviceInfo] = {}
+        self._usb_devices: Dict[str, Any] = {}
+        self._opened: Dict[str, Moondrop] = {}
+
+    def scan(self) -> List[DeviceInfo]:
+        """Enumerate matching devices on the bus.
+
+        Handles of devices still attached at the same path are kept; devices
+        that disappeared are dropped and their Moondrop instances closed.
+
+        Returns:
+            Information about every attached device, ordered by path.
+        """
+        found = find_devices(self.config)
+        with self._lock:
+            infos: Dict[str, DeviceInfo] = {}
+            usb_devices: Dict[str, Any] = {}
+            for usb_device in found:
+                path = device_path(usb_device)
+                known = self._infos.get(path)
+                if known is not None and known.address == usb_device.address:
+                    infos[path] = known
+                    usb_devices[path] = self._usb_devices[path]
+                    continue
+                infos[path] = DeviceInfo(
+                    path=path,
+                    serial=device_serial(usb_device),
+                    bus=usb_device.bus,
+                    address=usb_device.address
+                )
+                # An opened Moondrop at this path reconnects to the new handle itself
+                usb_devices[path] = usb_device
+            gone = [self._opened.pop(path) for path in set(self._opened) - set(infos)]
+            self._infos = infos
+            self._usb_devices = usb_devices
+            self._scanned = True
+            logging.info("Found %s device(s): %s.", len(infos), ', '.join(sorted(infos)) or 'none')
+        # Stop the monitor threads of devices that are gone, outside the lock
+        # since close() waits for any transfer in flight
+        for moondrop in gone:
+            moondrop.close()
+        return [infos[path] for path in sorted(infos)]
+
+    def devices(self) -> List[DeviceInfo]:
+        """Get the attached devices, scanning the bus only the first time.
+
+        Returns:
+            Information about every known device, ordered by path.
+        """
+        if not self._scanned:
+            return self.scan()
+        with self._lock:
+            return [self._infos[path] for path in sorted(self._infos)]
+
+    def resolve(self, identifier: Optional[str] = None) -> DeviceInfo:
+        """Find the device named by an identifier.
+
+        Args:
+            identifier: A bus/port path or serial number. The first device
+                is chosen when omitted.
+
+        Returns:
+            The matching device's information.
+
+        Raises:
+            ValueError: If no matching device is attached.
+        """
+        devices = self.devices()
+        if not devices:
+            raise ValueError("Device not found")
+        if identifier is None:
+            return devices[0]
+        for info in devices:
+            if info.matches(identifier):
+                return info
+        raise ValueError(f"Device not found: {identifier}")
+
+    def open(self, identifier: Optional[str] = None) -> Moondrop:
+        """Get the Moondrop instance for a device, opening it on first use.
+
+        Args:
+            identifier: A bus/port path or serial number. The first device
+                is chosen when omitted.
+
+        Returns:
+            The shared Moondrop instance for that device.
+
+        Raises:
+            ValueError: If no matching device is attached.
+        """
+        info = self.resolve(identifier)
+        with self._lock:
+            moondrop = self._opened.get(info.path)
+            if moondrop is None:
+                moondrop = Moondrop(
+                    self.config,
+                    usb_device=self._usb_devices[info.path],
+                    identifier=info.serial or info.path
+                )
+                self._opened[info.path] = moondrop
+            return moondrop
+
+    def open_all(self) -> Dict[str, Moondrop]:
+        """Open every attached device.
+
+        Returns:
+            Dictionary of device path to its Moondrop instance.
+        """
+        return {info.path: self.open(info.path) for info in self.devices()}
+
+
+def selected_device(config: AppConfig) -> Optional[str]:
+    """Get the identifier of the device the user selected.
+
+    Args:
+        config: Application configuration instance.
+
+    Returns:
+        The DAWNPRO_DEVICE environment variable if set, otherwise the
+        configured DEVICE_ID, or None to use the first device.
+    """
+    return os.environ.get(DEVICE_ENV_VAR) or config.device_identifiers.DEVICE_ID
@@ -1,6 +1,8 @@
 import logging
-from typing import List, Optional, Any, Dict
-import device.utils as utils
+import time
+from typing import List, Optional, Any, Dict, Mapping
+import device.protocol as protocol
+from device.state import ApplyResult
 
 
 class SetMethods:
@@ -15,6 +17,7 @@ class SetMethods:
         """
         self.device = device
         self.constants = constants
+        self._refresh_frame = bytes(constants['VOLUME_REFRESH_DATA'])
 
     def refresh_volume(self) -> Optional[List[int]]:
         """Refresh the volume settings.
@@ -23,120 +26,191 @@ class SetMethods:
             The response from the device, or None if failed.
         """
         try:
-            response = self.device.send_control_transfer(
-                self.constants['BM_REQUEST_TYPE_OUT'],
-                self.constants['B_REQUEST'],
-                self.constants['W_VALUE'],
-                self.constants['W_INDEX'],
-                self.constants['VOLUME_REFRESH_DATA']
-            )
-            logging.info("Volume refreshed.")
+            response = self.device.write(self._refresh_frame)
+            logging.debug("Volume refreshed.")
             return response
         except IOError:
             logging.error("Failed to refresh volume.")
             return None
 
-    def set_volume(self, volume: int) -> bool:
+    def set_volume(self, volume: int, force: bool = False, refresh: bool = True) -> bool:
         """Set the device volume.
 
         Args:
             volume: The volume level to set (0-60).
+            force: Send the write even if the device already holds this volume.
+            refresh: Send the volume refresh command after the write.
 
         Returns:
             True if successful, False otherwise.
+
+        Raises:
+            ValueError: If the value can't be encoded.
         """
-        data = [192, 165, 4, utils.convert_volume_to_payload(volume)]
+        if not self.device.known_state.should_write('volume', volume, force):
+            logging.info("Volume already %s; write skipped.", volume)
+            return True
+        frame = protocol.VOLUME.frame(volume)
         try:
-            self.device.send_control_transfer(
-                self.constants['BM_REQUEST_TYPE_OUT'],
-                self.constants['B_REQUEST'],
-                self.constants['W_VALUE'],
-                self.constants['W_INDEX'],
-                data
-            )
+            self.device.write(frame)
             self.device.volume = volume
-            self.refresh_volume()
-            logging.info(f"Volume set to {volume}.")
+            self.device.known_state.confirm('volume', volume)
+            self.device.invalidate_state()
+            if refresh:
+                self.refresh_volume()
+            logging.info("Volume set to %s.", volume)
             return True
         except IOError:
+            self.device.known_state.invalidate('volume')
             logging.error("Failed to set volume.")
             return False
 
-    def set_gain(self, gain: str) -> bool:
+    def set_gain(self, gain: str, force: bool = False, refresh: bool = True) -> bool:
         """Set the device gain.
 
         Args:
             gain: The gain setting to set ("Low" or "High").
+            force: Send the write even if the device already holds this gain.
+            refresh: Send the volume refresh command after the write.
 
         Returns:
             True if successful, False otherwise.
+
+        Raises:
+            ValueError: If the value can't be encoded.
         """
-        gain = utils.convert_gain_to_payload(gain)
-        data = [192, 165, 2, gain]
+        if not self.device.known_state.should_write('gain', gain, force):
+            logging.info("Gain already %s; write skipped.", gain)
+            return True
+        frame = protocol.GAIN.frame(gain)
         try:
-            self.device.send_control_transfer(
-                self.constants['BM_REQUEST_TYPE_OUT'],
-                self.constants['B_REQUEST'],
-                self.constants['W_VALUE'],
-                self.constants['W_INDEX'],
-                data
-            )
-            self.device.current_gain = gain
-            self.refresh_volume()
-            logging.info(f"Gain set to {gain}.")
+            self.device.write(frame)
+            self.device.current_gain = frame[3]
+            self.device.known_state.confirm('gain', gain)
+            self.device.invalidate_state()
+            if refresh:
+                self.refresh_volume()
+            logging.info("Gain set to %s.", gain)
             return True
         except IOError:
+            self.device.known_state.invalidate('gain')
             logging.error("Failed to set gain.")
             return False
 
-    def set_led_status(self, status: str) -> bool:
+    def set_led_status(self, status: str, force: bool = False) -> bool:
         """Set the LED status.
 
         Args:
             status: The LED status to set ("On", "Temporarily Off", or "Off").
+            force: Send the write even if the device already holds this status.
 
         Returns:
             True if successful, False otherwise.
+
+        Raises:
+            ValueError: If the value can't be encoded.
         """
-        status = utils.convert_led_status_to_payload(status)
-        data = [192, 165, 6, status]
+        if not self.device.known_state.should_write('led_status', status, force):
+            logging.info("LED status already %s; write skipped.", status)
+            return True
+        frame = protocol.LED.frame(status)
         try:
-            self.device.send_control_transfer(
-                self.constants['BM_REQUEST_TYPE_OUT'],
-                self.constants['B_REQUEST'],
-                self.constants['W_VALUE'],
-                self.constants['W_INDEX'],
-                data
-            )
-            self.device.led_status = status
-            logging.info(f"LED status set to {status}.")
+            self.device.write(frame)
+            self.device.led_status = frame[3]
+            self.device.known_state.confirm('led_status', status)
+            self.device.invalidate_state()
+            logging.info("LED status set to %s.", status)
             return True
         except IOError:
+            self.device.known_state.invalidate('led_status')
             logging.error("Failed to set LED status.")
             return False
 
-    def set_filter(self, filter_type: str) -> bool:
+    def set_filter(self, filter_type: str, force: bool = False) -> bool:
         """Set the filter type.
 
         Args:
             filter_type: The filter type to set.
+            force: Send the write even if the device already uses this filter.
 
         Returns:
             True if successful, False otherwise.
+
+        Raises:
+            ValueError: If the value can't be encoded.
         """
-        filter_type = utils.convert_filter_to_payload(filter_type)
-        data = [192, 165, 1, filter_type]
+        if not self.device.known_state.should_write('filter_type', filter_type, force):
+            logging.info("Filter already %s; write skipped.", filter_type)
+            return True
+        frame = protocol.FILTER.frame(filter_type)
         try:
-            self.device.send_control_transfer(
-                self.constants['BM_REQUEST_TYPE_OUT'],
-                self.constants['B_REQUEST'],
-                self.constants['W_VALUE'],
-                self.constants['W_INDEX'],
-                data
-            )
-            self.device.current_filter = filter_type
-            logging.info(f"Filter set to {filter_type}.")
+            self.device.write(frame)
+            self.device.current_filter = frame[3]
+            self.device.known_state.confirm('filter_type', filter_type)
+            self.device.invalidate_state()
+            logging.info("Filter set to %s.", filter_type)
             return True
         except IOError:
+            self.device.known_state.invalidate('filter_type')
             logging.error("Failed to set filter.")
             return False
+
+    # Filter and LED first, then gain, then volume so the final volume is
+    # written after any gain change.
+    APPLY_ORDER = ('filter_type', 'led_status', 'gain', 'volume')
+
+    def apply(self, settings: Mapping[str, Any], force: bool = False) -> ApplyResult:
+        """Apply several settings as one batch.
+
+        Writes are ordered, values the device already holds are skipped and
+        the volume is refreshed once at the end instead of after every
+        volume or gain write. The batch runs in one transaction, so other
+        threads' transfers wait until it is done.
+
+        Args:
+            settings: Mapping of field name ("volume", "gain", "filter_type",
+                "led_status") to target value. None values are ignored.
+            force: Send every write even if the device already holds the value.
+
+        Returns:
+            ApplyResult with per-field success.
+
+        Raises:
+            ValueError: If settings contains an unknown field or a value
+                that can't be encoded.
+        """
+        unknown = set(settings) - set(self.APPLY_ORDER)
+        if unknown:
+            raise ValueError(f"Unknown settings: {', '.join(sorted(unknown))}")
+        for name, value in settings.items():
+            if value is not None and not protocol.COMMANDS[name].accepts(value):
+                raise ValueError(f"Invalid {name}: {value!r}")
+
+        started = time.monotonic()
+        setters = {
+            'filter_type': self.set_filter,
+            'led_status': self.set_led_status,
+            'gain': lambda value, force: self.set_gain(value, force, refresh=False),
+            'volume': lambda value, force: self.set_volume(value, force, refresh=False)
+        }
+        result = ApplyResult()
+        needs_refresh = False
+        with self.device.transaction():
+            for name in self.APPLY_ORDER:
+                value = settings.get(name)
+                if value is None:
+                    continue
+                if not force and self.device.known_state.is_confirmed(name, value):
+                    result.elided.append(name)
+                result.results[name] = setters[name](value, force)
+                if name in ('gain', 'volume') and name not in result.elided:
+                    needs_refresh = True
+
+            if needs_refresh:
+                result.refreshed = self.refresh_volume() is not None
+        result.elapsed = time.monotonic() - started
+        logging.info(
+            "Applied %d settings (%d skipped, failed: %s) in %.0f ms.",
+            len(result.results), len(result.elided), result.failed() or 'none', result.elapsed * 1000
+        )
+        return result
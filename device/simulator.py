@@ -0,0 +1,248 @@
+import array
+import errno
+import random
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Union
+import usb.core
+from device.config import AppConfig
+from device.protocol import (
+    HEADER, SETTINGS_QUERY, VOLUME_QUERY, SET_FILTER, SET_GAIN, SET_VOLUME, SET_LED,
+    GAIN_NAMES, FILTER_NAMES, LED_NAMES
+)
+
+# libusb error codes raised through usb.core.USBError
+LIBUSB_ERROR_IO = -1
+LIBUSB_ERROR_NO_DEVICE = -4
+LIBUSB_ERROR_TIMEOUT = -7
+LIBUSB_ERROR_PIPE = -9
+
+
+class SimulatedDawnPro:
+    """In-memory stand-in for a Dawn Pro's pyusb device.
+
+    Implements ctrl_transfer for the vendor protocol used by GetMethods and
+    SetMethods: the 0xA3 settings query, the 0xA2 volume refresh and the
+    filter/gain/volume/LED set opcodes. Transfers can be given latency and
+    jitter, and failures can be injected at random or on demand. Errors are
+    raised as usb.core.USBError so the real error handling is exercised.
+    """
+
+    def __init__(
+        self,
+        config: Optional[AppConfig] = None,
+        index: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        fault_rate: float = 0.0,
+        seed: Optional[int] = None
+    ) -> None:
+        """Initialize the simulated device.
+
+        Args:
+            config: Application configuration; protocol constants are read from it.
+            index: Position of this unit, used for its port path and serial.
+            latency: Seconds each transfer takes.
+            jitter: Extra random seconds, uniformly distributed, per transfer.
+            fault_rate: Probability (0-1) that a transfer fails with a pipe error.
+            seed: Seed for the jitter and fault generator, for repeatable runs.
+        """
+        config = config or AppConfig()
+        self.idVendor = config.device_identifiers.MOONDROP_VID
+        self.idProduct = config.device_identifiers.DAWN_PRO_PID
+        self.bus = 0
+        self.address = index + 1
+        self.port_numbers = (index + 1,)
+        self.iSerialNumber = 3
+        self.serial_number = f"SIM{index + 1:04d}"
+        self.constants = config.device_constants
+        self.latency = latency
+        self.jitter = jitter
+        self.fault_rate = fault_rate
+        self.random = random.Random(seed)
+        self.attached = True
+        self.filter_type = 0
+        self.gain = 0
+        self.led_status = 0
+        self.volume = 0x28
+        self.transfers = 0
+        self.counts: Dict[str, int] = {}
+        self._pending_query: Optional[int] = None
+        self._forced_errors: List[int] = []
+        self._lock = threading.Lock()
+
+    def unplug(self) -> None:
+        """Make every transfer fail as if the cable were pulled."""
+        self.attached = False
+
+    def replug(self) -> None:
+        """Reattach the device after unplug()."""
+        self.attached = True
+        self._pending_query = None
+
+    def get_active_configuration(self) -> None:
+        """Answer the presence probe, failing like a transfer once unplugged.
+
+        Raises:
+            usb.core.USBError: If the device is unplugged.
+        """
+        with self._lock:
+            self._count('configuration')
+            if not self.attached:
+                self._raise(LIBUSB_ERROR_NO_DEVICE)
+
+    def fail_next(self, count: int = 1, error_code: int = LIBUSB_ERROR_PIPE) -> None:
+        """Make the next transfers fail.
+
+        Args:
+            count: Number of transfers to fail.
+            error_code: libusb error code to report.
+        """
+        with self._lock:
+            self._forced_errors.extend([error_code] * count)
+
+    def ctrl_transfer(
+        self,
+        bmRequestType: int,
+        bRequest: int,
+        wValue: int = 0,
+        wIndex: int = 0,
+        data_or_wLength: Union[Sequence[int], int, None] = None,
+        timeout: Optional[int] = None
+    ) -> Union[int, array.array]:
+        """Perform a simulated control transfer.
+
+        Args:
+            bmRequestType: The request type.
+            bRequest: The request number.
+            wValue: The value field.
+            wIndex: The index field.
+            data_or_wLength: Data to send for OUT transfers, length for IN.
+            timeout: Timeout in milliseconds; simulated latency beyond it fails.
+
+        Returns:
+            Bytes written for OUT transfers, the response for IN transfers.
+
+        Raises:
+            usb.core.USBError: On injected faults, unplugged device or
+                malformed requests.
+        """
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if timeout and delay * 1000 > timeout:
+            time.sleep(timeout / 1000)
+            raise usb.core.USBError("Operation timed out", LIBUSB_ERROR_TIMEOUT, errno.ETIMEDOUT)
+        if delay > 0:
+            time.sleep(delay)
+
+        with self._lock:
+            self.transfers += 1
+            if not self.attached:
+                raise usb.core.USBError("No such device", LIBUSB_ERROR_NO_DEVICE, errno.ENODEV)
+            if self._forced_errors:
+                self._raise(self._forced_errors.pop(0))
+            if self.fault_rate and self.random.random() < self.fault_rate:
+                self._raise(LIBUSB_ERROR_PIPE)
+            if wValue != self.constants.W_VALUE or wIndex != self.constants.W_INDEX:
+                self._raise(LIBUSB_ERROR_PIPE)
+
+            if bmRequestType == self.constants.BM_REQUEST_TYPE_OUT and bRequest == self.constants.B_REQUEST:
+                return self._write(list(data_or_wLength or []))
+            if bmRequestType == self.constants.BM_REQUEST_TYPE_IN and bRequest == self.constants.B_REQUEST_GET:
+                return self._read(int(data_or_wLength or 0))
+            self._raise(LIBUSB_ERROR_PIPE)
+        return 0
+
+    def _raise(self, error_code: int) -> None:
+        """Raise a USBError for a libusb error code."""
+        errors = {
+            LIBUSB_ERROR_IO: ("Input/Output Error", errno.EIO),
+            LIBUSB_ERROR_NO_DEVICE: ("No such device", errno.ENODEV),
+            LIBUSB_ERROR_TIMEOUT: ("Operation timed out", errno.ETIMEDOUT),
+            LIBUSB_ERROR_PIPE: ("Pipe error", errno.EPIPE)
+        }
+        message, error_errno = errors.get(error_code, ("Unknown error", errno.EIO))
+        raise usb.core.USBError(message, error_code, error_errno)
+
+    def _count(self, name: str) -> None:
+        """Count a handled request by kind."""
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def _write(self, data: List[int]) -> int:
+        """Handle an OUT transfer."""
+        if len(data) < 3 or tuple(data[:2]) != HEADER:
+            self._raise(LIBUSB_ERROR_PIPE)
+        opcode = data[2]
+        if opcode in (SETTINGS_QUERY, VOLUME_QUERY):
+            self._count('settings_query' if opcode == SETTINGS_QUERY else 'volume_query')
+            self._pending_query = opcode
+            return len(data)
+        if len(data) < 4:
+            self._raise(LIBUSB_ERROR_PIPE)
+        value = data[3]
+        if opcode == SET_FILTER and value < len(FILTER_NAMES):
+            self.filter_type = value
+            self._count('set_filter')
+        elif opcode == SET_GAIN and value < len(GAIN_NAMES):
+            self.gain = value
+            self._count('set_gain')
+        elif opcode == SET_VOLUME and value <= 0xFF:
+            self.volume = value
+            self._count('set_volume')
+        elif opcode == SET_LED and value < len(LED_NAMES):
+            self.led_status = value
+            self._count('set_led')
+        else:
+            self._raise(LIBUSB_ERROR_PIPE)
+        return len(data)
+
+    def _read(self, length: int) -> array.array:
+        """Handle an IN transfer answering the last query."""
+        self._count('read')
+        if self._pending_query == SETTINGS_QUERY:
+            response = [*HEADER, SETTINGS_QUERY, self.filter_type, self.gain, self.led_status, 0]
+        elif self._pending_query == VOLUME_QUERY:
+            response = [*HEADER, VOLUME_QUERY, 0, self.volume, 0, 0]
+        else:
+            self._raise(LIBUSB_ERROR_TIMEOUT)
+        return array.array('B', response[:length])
+
+
+_simulated: Optional[List[SimulatedDawnPro]] = None
+_simulated_lock = threading.Lock()
+
+
+def simulated_devices(config: AppConfig) -> List[SimulatedDawnPro]:
+    """Get the simulated units for this process, creating them on first use.
+
+    The same units are returned on every call, so a Moondrop and a registry
+    in one process see the same simulated hardware.
+
+    Args:
+        config: Application configuration used when creating the units.
+
+    Returns:
+        The simulated devices.
+    """
+    global _simulated
+    transport = config.transport
+    with _simulated_lock:
+        if _simulated is None:
+            _simulated = [
+                SimulatedDawnPro(
+                    config,
+                    index=index,
+                    latency=transport.SIM_LATENCY,
+                    jitter=transport.SIM_JITTER,
+                    fault_rate=transport.SIM_FAULT_RATE,
+                    seed=index
+                )
+                for index in range(transport.SIM_DEVICES)
+            ]
+        return _simulated
+
+
+def reset_simulated_devices() -> None:
+    """Discard the simulated units so the next lookup creates fresh ones."""
+    global _simulated
+    with _simulated_lock:
+        _simulated = None
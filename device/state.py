@@ -0,0 +1,70 @@
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+import device.protocol as protocol
+
+
+@dataclass(frozen=True)
+class DeviceState:
+    """Snapshot of every setting reported by the device."""
+    volume: Optional[int]
+    gain: str
+    filter_type: str
+    led_status: str
+    timestamp: float = field(default_factory=time.monotonic)
+
+    @classmethod
+    def from_responses(
+        cls,
+        settings: Sequence[int],
+        volume: Optional[Sequence[int]] = None
+    ) -> 'DeviceState':
+        """Decode a settings read and an optional volume read into a snapshot.
+
+        Args:
+            settings: 7-byte response to the [0xC0, 0xA5, 0xA3] query.
+            volume: 7-byte response to the volume refresh query, if read.
+
+        Returns:
+            DeviceState holding every decoded field.
+
+        Raises:
+            ValueError: If a response is too short.
+        """
+        decoded = protocol.SettingsResponse.parse(settings)
+        return cls(
+            volume=protocol.parse_volume(volume) if volume else None,
+            gain=decoded.gain,
+            filter_type=decoded.filter_type,
+            led_status=decoded.led_status
+        )
+
+    def age(self) -> float:
+        """Get the number of seconds since this snapshot was taken.
+
+        Returns:
+            Age of the snapshot in seconds.
+        """
+        return time.monotonic() - self.timestamp
+
+
+@dataclass
+class ApplyResult:
+    """Outcome of applying several settings as one batch."""
+    results: Dict[str, bool] = field(default_factory=dict)
+    elided: List[str] = field(default_factory=list)
+    refreshed: bool = False
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """Whether every requested field was applied."""
+        return all(self.results.values())
+
+    def failed(self) -> List[str]:
+        """Get the fields that could not be applied.
+
+        Returns:
+            Names of the failed fields, in apply order.
+        """
+        return [name for name, success in self.results.items() if not success]
@@ -0,0 +1,72 @@
+import time
+from typing import Any, List, Optional, Tuple
+
+
+class Timeline:
+    """Records named milestones relative to process start.
+
+    Only the standard library is used, so scripts can import this before
+    anything slow and measure their own startup.
+    """
+
+    def __init__(self, started: Optional[float] = None) -> None:
+        """Initialize the timeline.
+
+        Args:
+            started: time.perf_counter() value the milestones are measured
+                from; now when omitted.
+        """
+        self.started = time.perf_counter() if started is None else started
+        self.marks: List[Tuple[str, float]] = [('start', self.started)]
+
+    def mark(self, name: str) -> None:
+        """Record a milestone.
+
+        Args:
+            name: The milestone name.
+        """
+        self.marks.append((name, time.perf_counter()))
+
+    def elapsed_ms(self, name: str) -> Optional[float]:
+        """Get the time from process start to a milestone.
+
+        Args:
+            name: The milestone name.
+
+        Returns:
+            Milliseconds since start, or None if the milestone wasn't reached.
+        """
+        for mark, moment in self.marks:
+            if mark == name:
+                return (moment - self.started) * 1000
+        return None
+
+    def summary(self) -> str:
+        """Build a one-line summary of every milestone.
+
+        Returns:
+            Milestones with their milliseconds since start.
+        """
+        return ', '.join(
+            f"{name} {(moment - self.started) * 1000:.1f} ms" for name, moment in self.marks[1:]
+        )
+
+    def report(self, stream: Any) -> float:
+        """Write every milestone and the total to a stream.
+
+        Args:
+            stream: File object to write to.
+
+        Returns:
+            Total elapsed milliseconds.
+        """
+        previous = self.started
+        for name, moment in self.marks[1:]:
+            stream.write(
+                f"{name:>16}: {(moment - self.started) * 1000:7.1f} ms "
+                f"(+{(moment - previous) * 1000:.1f})\n"
+            )
+            previous = moment
+        total = (time.perf_counter() - self.started) * 1000
+        stream.write(f"{'total':>16}: {total:7.1f} ms\n")
+        return total
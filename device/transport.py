@@ -0,0 +1,62 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+
+class TransportLock:
+    """Per-device lock serializing control transfers, with wait statistics.
+
+    The lock is re-entrant, so a query holding it for its OUT and IN
+    transfers can send both through the same locked path, and a batch can
+    hold it across several queries or writes. Acquiring an uncontended
+    lock costs no clock reads; only callers that had to wait are timed.
+    """
+
+    def __init__(self, on_wait: Optional[Callable[[float], None]] = None) -> None:
+        """Initialize the lock.
+
+        Args:
+            on_wait: Called with the seconds a caller waited, for every
+                contended acquisition, while the lock is held.
+        """
+        self.on_wait = on_wait
+        self._lock = threading.RLock()
+        self._acquired = 0
+        self._contended = 0
+        self._wait_time = 0.0
+        self._max_wait = 0.0
+
+    @contextmanager
+    def hold(self) -> Iterator[None]:
+        """Hold the lock for the duration of a with block."""
+        if not self._lock.acquire(blocking=False):
+            started = time.perf_counter()
+            self._lock.acquire()
+            waited = time.perf_counter() - started
+            # Counters are only touched while holding the lock
+            self._contended += 1
+            self._wait_time += waited
+            if waited > self._max_wait:
+                self._max_wait = waited
+            if self.on_wait is not None:
+                self.on_wait(waited)
+        self._acquired += 1
+        try:
+            yield
+        finally:
+            self._lock.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get lock statistics.
+
+        Returns:
+            Dictionary with acquisitions, contended acquisitions and the
+            total and longest wait in milliseconds.
+        """
+        return {
+            'acquired': self._acquired,
+            'contended': self._contended,
+            'wait_ms': self._wait_time * 1000,
+            'max_wait_ms': self._max_wait * 1000
+        }
@@ -0,0 +1,110 @@
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+
+
+class DeviceWorker:
+    """Runs device commands on a dedicated thread.
+
+    Commands are executed one at a time in submission order. Completion
+    callbacks are handed to a dispatch function so they can run on another
+    thread; the GUI passes GLib.idle_add to deliver them on the GTK main loop.
+    """
+
+    def __init__(
+        self,
+        dispatch: Optional[Callable[..., Any]] = None,
+        name: str = "dawnpro-device"
+    ) -> None:
+        """Initialize the worker.
+
+        Args:
+            dispatch: Called as dispatch(function, *args) to deliver callbacks.
+                Callbacks run on the worker thread when omitted.
+            name: Name of the worker thread.
+        """
+        self.dispatch = dispatch
+        self._queue: 'queue.Queue[Optional[tuple]]' = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self) -> None:
+        """Start the worker thread."""
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the worker after the commands already queued have run.
+
+        Args:
+            timeout: Maximum seconds to wait for the thread to finish.
+        """
+        self._queue.put(None)
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def pending(self) -> int:
+        """Get the number of commands waiting to run.
+
+        Returns:
+            Approximate queue length.
+        """
+        return self._queue.qsize()
+
+    def submit(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        callback: Optional[Callable[[Any], Any]] = None,
+        error_callback: Optional[Callable[[BaseException], Any]] = None,
+        **kwargs: Any
+    ) -> Future:
+        """Queue a command for the worker thread.
+
+        Args:
+            func: The command to run.
+            *args: Positional arguments for the command.
+            callback: Receives the command's return value.
+            error_callback: Receives the exception if the command raised.
+            **kwargs: Keyword arguments for the command.
+
+        Returns:
+            A Future resolved with the command's result.
+        """
+        future: Future = Future()
+        self._queue.put((future, func, args, kwargs, callback, error_callback))
+        return future
+
+    def _run(self) -> None:
+        """Execute queued commands until stopped."""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            future, func, args, kwargs, callback, error_callback = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = func(*args, **kwargs)
+            except Exception as error:
+                logging.exception("Device command %s failed", getattr(func, '__name__', func))
+                future.set_exception(error)
+                if error_callback is not None:
+                    self._deliver(error_callback, error)
+                continue
+            future.set_result(result)
+            if callback is not None:
+                self._deliver(callback, result)
+
+    def _deliver(self, callback: Callable[[Any], Any], value: Any) -> None:
+        """Hand a callback to the dispatcher, or run it inline."""
+        if self.dispatch is None:
+            callback(value)
+        else:
+            self.dispatch(self._invoke_once, callback, value)
+
+    @staticmethod
+    def _invoke_once(callback: Callable[[Any], Any], value: Any) -> bool:
+        """Run a dispatched callback; returns False so idle sources are removed."""
+        callback(value)
+        return False
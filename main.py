@@ -1,39 +1,25 @@
+import time
+
+_STARTED = time.perf_counter()
+
 import gi
-from typing import Optional
+from typing import Any, Callable, Optional, Sequence, Tuple
 gi.require_version('Gtk', '3.0')
-from gi.repository import Gtk
-from device.moondrop import Moondrop
+from gi.repository import Gtk, GLib
+from device.registry import DeviceRegistry, selected_device
+from device.state import ApplyResult, DeviceState
+from device.worker import DeviceWorker
+from device.coalesce import CoalescingChannel
 from device.config import AppConfig
+from device.config_store import ConfigStore
+from device.log import setup_logging
+from device.moondrop import Moondrop
+from device.timeline import Timeline
+import device.presets as presets
 import sys
-import os
 import logging
 
 
-def setup_logging(config: AppConfig) -> None:
-    """Set up logging configuration.
-
-    Args:
-        config: Application configuration instance.
-    """
-    log_config = config.logging
-    handlers = [logging.StreamHandler()]
-
-    if log_config.LOG_FILE:
-        # Expand ~ in log file path
-        log_file_path = os.path.expanduser(log_config.LOG_FILE)
-        # Create log directory if it doesn't exist
-        log_dir = os.path.dirname(log_file_path)
-        if log_dir:
-            os.makedirs(log_dir, exist_ok=True)
-        handlers.append(logging.FileHandler(log_file_path))
-
-    logging.basicConfig(
-        level=getattr(logging, log_config.LOG_LEVEL),
-        format=log_config.LOG_FORMAT,
-        handlers=handlers
-    )
-
-
 def show_error_dialog(message: str) -> None:
     """Display an error dialog with the given message.
 
@@ -68,38 +54,94 @@ def show_success_dialog(message: str) -> None:
     dialog.destroy()
 
 
-def load_config() -> AppConfig:
-    """Load application configuration.
+# Startup milestones, logged once the first device state is shown
+timeline = Timeline(_STARTED)
+
+# Load configuration
+config_store = ConfigStore()
+config = config_store.load()
+setup_logging(config)
+timeline.mark('config loaded')
+
+# Devices are enumerated and opened on the worker once the window is up
+registry = DeviceRegistry(config)
+
+# All device I/O runs on this thread; results come back via the GTK main loop
+worker = DeviceWorker(dispatch=GLib.idle_add)
+worker.start()
+
 
-    Returns:
-        AppConfig instance with loaded settings.
+class ControlBinding:
+    """Binds a control to device state without echoing updates back as writes.
+
+    The user-edit handler only runs for changes made by the user; values
+    pushed from the device are applied with the handler blocked.
     """
-    config_path = os.path.expanduser('~/.config/dawnpro/config.json')
-    return AppConfig.load_from_file(config_path)
 
+    def __init__(
+        self,
+        widget: Gtk.Widget,
+        signal: str,
+        on_user_change: Callable[[Gtk.Widget], None],
+        options: Optional[Sequence[str]] = None,
+        label: Optional[Gtk.Label] = None,
+        label_prefix: str = ""
+    ) -> None:
+        """Initialize the binding and connect the user-edit handler.
 
-# Load configuration
-config = load_config()
-setup_logging(config)
+        Args:
+            widget: A Gtk.Scale, or a Gtk.ComboBoxText when options are given.
+            signal: The widget signal emitted on change.
+            on_user_change: Handler for changes made by the user.
+            options: Combo box entries, in display order.
+            label: Label mirroring the current value.
+            label_prefix: Text shown before the value in the label.
+        """
+        self.widget = widget
+        self.options = options
+        self.label = label
+        self.label_prefix = label_prefix
+        self.handler_id = widget.connect(signal, on_user_change)
 
-try:
-    moondrop = Moondrop(config)
-except ValueError as err:
-    show_error_dialog(str(err))
-    sys.exit(1)
+    def update(self, value: Any) -> None:
+        """Show a value read from the device without triggering a write.
+
+        Args:
+            value: The device value to display.
+        """
+        self.widget.handler_block(self.handler_id)
+        try:
+            if self.options is None:
+                self.widget.set_value(value)
+            elif value in self.options:
+                self.widget.set_active(self.options.index(value))
+        finally:
+            self.widget.handler_unblock(self.handler_id)
+        if self.label is not None:
+            self.label.set_text(f"{self.label_prefix}{value}")
 
 
 class ModernGUI(Gtk.Window):
     """Main GUI window for the Moondrop Dawn Pro Control application."""
 
+    # Seconds between attempts to read the first state when a read fails
+    FIRST_STATE_RETRY = 2
+
     def __init__(self, config: AppConfig) -> None:
         """Initialize the GUI window and its components.
 
+        The controls start out disabled and showing the configured defaults;
+        the device is opened on the worker and the controls are enabled
+        once its first state has been read.
+
         Args:
             config: Application configuration instance.
         """
         super().__init__(title="Moondrop Dawn Pro Control")
         self.config = config
+        self.moondrop: Optional[Moondrop] = None
+        self.open_failed = False
+        self.has_state = False
         self.set_default_size(
             config.ui_metrics.WINDOW_WIDTH,
             config.ui_metrics.WINDOW_HEIGHT
@@ -115,17 +157,92 @@ class ModernGUI(Gtk.Window):
         self.vbox.set_margin_end(config.ui_metrics.MARGIN_END)
         self.add(self.vbox)
 
+        # Slider drags only ever write the newest position
+        self.volume_channel = CoalescingChannel(
+            lambda volume: self.moondrop.set_volume(volume),
+            lambda flush: worker.submit(flush, callback=self.on_volume_flushed),
+            flush_delay=config.transport.VOLUME_FLUSH_DELAY
+        )
+
         self.create_volume_slider()
         self.create_led_toggle()
         self.create_gain_selector()
         self.create_filter_selector()
+        self.create_preset_selector()
         self.create_button_box()
+        self.vbox.set_sensitive(False)
+
+        worker.submit(
+            registry.open, selected_device(config),
+            callback=self.on_device_opened, error_callback=self.on_device_open_failed
+        )
+
+    def on_device_opened(self, moondrop: Moondrop) -> None:
+        """Hook up a device opened on the worker and queue its startup I/O.
+
+        Args:
+            moondrop: The opened device.
+        """
+        timeline.mark('device opened')
+        self.moondrop = moondrop
+        if len(registry.devices()) > 1:
+            self.set_title(f"Moondrop Dawn Pro Control ({moondrop.identifier})")
+
+        moondrop.connection.add_listener(
+            lambda connected: GLib.idle_add(self.on_connection_changed, connected)
+        )
+        # Changes from the hardware knob (or any other write) update the controls
+        moondrop.subscribe(lambda field, value: GLib.idle_add(self.on_device_changed, field, value))
+        if self.config.transport.POLL_ENABLED:
+            # Polls queue behind other commands on the worker instead of interleaving
+            moondrop.start_polling(run=lambda poll: worker.submit(poll).result())
+
+        # Apply saved settings to device if config file exists, then read the
+        # state the controls are enabled with
+        if config_store.exists():
+            worker.submit(self.apply_saved_settings)
+        worker.submit(moondrop.get_state, max_age=0, callback=self.on_first_state)
+
+    def on_device_open_failed(self, error: BaseException) -> None:
+        """Report that no device could be opened and quit.
+
+        Args:
+            error: The error raised while opening the device.
+        """
+        self.open_failed = True
+        show_error_dialog(str(error))
+        Gtk.main_quit()
+
+    def on_first_state(self, state: Optional[DeviceState]) -> None:
+        """Show the first device state, enable the controls and log the startup timeline.
 
-        # Apply saved settings to device if config file exists, then refresh UI
-        config_path = os.path.expanduser('~/.config/dawnpro/config.json')
-        if os.path.exists(config_path):
-            self.apply_saved_settings()
-        self.on_refresh_clicked(None)
+        If the read failed the controls stay disabled and the read is retried,
+        so they never act on the configured defaults instead of the device's
+        settings.
+
+        Args:
+            state: The snapshot read from the device, or None if the read failed.
+        """
+        if state is None:
+            logging.warning(
+                "Failed to read the device state; retrying in %d s", self.FIRST_STATE_RETRY
+            )
+            GLib.timeout_add_seconds(self.FIRST_STATE_RETRY, self.retry_first_state)
+            return
+        timeline.mark('first state')
+        self.has_state = True
+        self.update_from_state(state)
+        self.vbox.set_sensitive(self.moondrop.is_connected)
+        logging.info("Startup: %s", timeline.summary())
+
+    def retry_first_state(self) -> bool:
+        """Read the device state again for on_first_state.
+
+        Returns:
+            False so the timeout source is removed.
+        """
+        worker.submit(self.moondrop.get_state, max_age=0, callback=self.on_first_state)
+        return False
 
     def create_volume_slider(self) -> None:
         """Create and configure the volume slider."""
@@ -133,7 +250,9 @@ class ModernGUI(Gtk.Window):
         self.slider.set_value(self.config.default_settings.DEFAULT_VOLUME)
         self.slider.set_margin_bottom(self.config.ui_metrics.MARGIN_BOTTOM)
         self.vbox.pack_start(self.slider, True, True, 0)
-        self.slider.connect("value-changed", self.on_slider_value_changed)
+        self.volume_binding = ControlBinding(
+            self.slider, "value-changed", self.on_slider_value_changed
+        )
 
     def create_led_toggle(self) -> None:
         """Create and configure the LED toggle."""
@@ -151,7 +270,11 @@ class ModernGUI(Gtk.Window):
         self.led_toggle.set_active(led_map.get(self.config.default_settings.DEFAULT_LED_STATUS, 0))
         self.led_toggle.set_margin_bottom(self.config.ui_metrics.MARGIN_BOTTOM)
         self.vbox.pack_start(self.led_toggle, True, True, 0)
-        self.led_toggle.connect("changed", self.on_led_toggle_changed)
+        self.led_binding = ControlBinding(
+            self.led_toggle, "changed", self.on_led_toggle_changed,
+            options=("On", "Temporarily Off", "Off"),
+            label=self.led_toggle_label, label_prefix="LED Toggle: "
+        )
 
     def create_gain_selector(self) -> None:
         """Create and configure the gain selector."""
@@ -167,7 +290,11 @@ class ModernGUI(Gtk.Window):
         self.gain.set_active(0 if self.config.default_settings.DEFAULT_GAIN == "Low" else 1)
         self.gain.set_margin_bottom(self.config.ui_metrics.MARGIN_BOTTOM)
         self.vbox.pack_start(self.gain, True, True, 0)
-        self.gain.connect("changed", self.on_gain_changed)
+        self.gain_binding = ControlBinding(
+            self.gain, "changed", self.on_gain_changed,
+            options=("Low", "High"),
+            label=self.gain_label, label_prefix="Gain: "
+        )
 
     def create_filter_selector(self) -> None:
         """Create and configure the filter selector."""
@@ -193,7 +320,45 @@ class ModernGUI(Gtk.Window):
         self.filter.set_active(filter_map.get(self.config.default_settings.DEFAULT_FILTER, 0))
         self.filter.set_margin_bottom(self.config.ui_metrics.MARGIN_BOTTOM)
         self.vbox.pack_start(self.filter, True, True, 0)
-        self.filter.connect("changed", self.on_filter_changed)
+        self.filter_binding = ControlBinding(
+            self.filter, "changed", self.on_filter_changed,
+            options=(
+                "Fast Roll-Off Low Latency",
+                "Fast Roll-Off Phase Compensated",
+                "Slow Roll-Off Low Latency",
+                "Slow Roll-Off Phase Compensated",
+                "Non-Oversampling"
+            ),
+            label=self.filter_label, label_prefix="Filter: "
+        )
+
+    def create_preset_selector(self) -> None:
+        """Create the preset selector with its apply and save buttons."""
+        preset_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+        preset_box.pack_start(Gtk.Label(label="Preset:"), False, False, 0)
+        self.preset = Gtk.ComboBoxText()
+        self.fill_preset_selector()
+        preset_box.pack_start(self.preset, True, True, 0)
+        self.preset_apply_button = Gtk.Button(label="Apply")
+        self.preset_apply_button.connect("clicked", self.on_preset_apply_clicked)
+        preset_box.pack_start(self.preset_apply_button, False, False, 0)
+        self.preset_save_button = Gtk.Button(label="Save As...")
+        self.preset_save_button.connect("clicked", self.on_preset_save_clicked)
+        preset_box.pack_start(self.preset_save_button, False, False, 0)
+        self.vbox.pack_start(preset_box, True, True, 0)
+
+    def fill_preset_selector(self, active: Optional[str] = None) -> None:
+        """List the configured presets in the preset selector.
+
+        Args:
+            active: Preset to select afterwards.
+        """
+        self.preset.remove_all()
+        names = presets.preset_names(self.config)
+        for name in names:
+            self.preset.append_text(name)
+        if active in names:
+            self.preset.set_active(names.index(active))
 
     def create_button_box(self) -> None:
         """Create and configure the button box with refresh and save buttons."""
@@ -207,108 +372,230 @@ class ModernGUI(Gtk.Window):
         button_box.pack_start(self.save_button, True, True, 0)
         self.vbox.pack_start(button_box, True, True, 0)
 
+    def report_write(self, label: str, value: Any, success: bool) -> None:
+        """Report the outcome of a device write.
+
+        Args:
+            label: Human-readable name of the setting.
+            value: The value that was written.
+            success: Whether the write succeeded.
+        """
+        if not success and not self.moondrop.is_connected:
+            logging.warning("Device disconnected; %s not set to %s", label, value)
+        elif not success and self.moondrop.is_wedged:
+            # One dialog per queued write would pile up while the device recovers
+            logging.warning("Device not responding; %s not set to %s", label, value)
+        elif not success:
+            show_error_dialog(f"Failed to set {label} to {value}")
+            logging.error("Failed to set %s to %s", label, value)
+        else:
+            logging.info("%s%s set to %s", label[0].upper(), label[1:], value)
+
+    def submit_write(self, setter: Callable[[Any], bool], value: Any, label: str) -> None:
+        """Queue a device write on the worker and report its outcome.
+
+        Args:
+            setter: The Moondrop setter to call.
+            value: The value to write.
+            label: Human-readable name of the setting.
+        """
+        worker.submit(
+            setter, value,
+            callback=lambda success: self.report_write(label, value, success)
+        )
+
     def on_slider_value_changed(self, slider: Gtk.Scale) -> None:
         """Handle the volume slider value change event."""
-        value = int(slider.get_value())
-        if not moondrop.set_volume(value):
-            show_error_dialog(f"Failed to set volume to {value}")
-            logging.error(f"Failed to set volume to {value}")
-        else:
-            logging.info(f"Volume set to {value}")
+        self.volume_channel.push(int(slider.get_value()))
+
+    def on_volume_flushed(self, outcome: Optional[Tuple[int, bool]]) -> None:
+        """Report the result of a coalesced volume write.
+
+        Args:
+            outcome: Tuple of (volume, success), or None if nothing was sent.
+        """
+        if outcome is not None:
+            self.report_write("volume", *outcome)
 
     def on_led_toggle_changed(self, combo: Gtk.ComboBoxText) -> None:
         """Handle the LED toggle change event."""
         text = combo.get_active_text()
         self.led_toggle_label.set_text(f"LED Toggle: {text}")
-        if not moondrop.set_led_status(text):
-            show_error_dialog(f"Failed to set LED status to {text}")
-            logging.error(f"Failed to set LED status to {text}")
-        else:
-            logging.info(f"LED status set to {text}")
+        self.submit_write(self.moondrop.set_led_status, text, "LED status")
 
     def on_gain_changed(self, combo: Gtk.ComboBoxText) -> None:
         """Handle the gain selector change event."""
         text = combo.get_active_text()
         self.gain_label.set_text(f"Gain: {text}")
-        if not moondrop.set_gain(text):
-            show_error_dialog(f"Failed to set gain to {text}")
-            logging.error(f"Failed to set gain to {text}")
-        else:
-            logging.info(f"Gain set to {text}")
+        self.submit_write(self.moondrop.set_gain, text, "gain")
 
     def on_filter_changed(self, combo: Gtk.ComboBoxText) -> None:
         """Handle the filter selector change event."""
         text = combo.get_active_text()
         self.filter_label.set_text(f"Filter: {text}")
-        if not moondrop.set_filter(text):
-            show_error_dialog(f"Failed to set filter to {text}")
-            logging.error(f"Failed to set filter to {text}")
-        else:
-            logging.info(f"Filter set to {text}")
+        self.submit_write(self.moondrop.set_filter, text, "filter")
 
     def apply_saved_settings(self) -> None:
-        """Apply saved settings from config to the device."""
+        """Apply saved settings from config to the device as one batch.
+
+        Runs on the device worker thread.
+        """
+        result = self.moondrop.apply(self.config.default_settings.to_settings())
+        timeline.mark('settings restored')
+        for name, success in result.results.items():
+            if success:
+                logging.info("Applied saved %s", name)
+        if not result.ok:
+            logging.warning("Failed to apply saved settings: %s", ', '.join(result.failed()))
+
+    def on_preset_apply_clicked(self, button: Gtk.Button) -> None:
+        """Apply the selected preset, writing only the fields that differ."""
+        name = self.preset.get_active_text()
+        if name is None:
+            return
         try:
-            # Apply volume
-            volume = self.config.default_settings.DEFAULT_VOLUME
-            if volume is not None:
-                moondrop.set_volume(volume)
-                logging.info(f"Applied saved volume: {volume}")
-            
-            # Apply LED status
-            led_status = self.config.default_settings.DEFAULT_LED_STATUS
-            if led_status:
-                moondrop.set_led_status(led_status)
-                logging.info(f"Applied saved LED status: {led_status}")
-            
-            # Apply gain
-            gain = self.config.default_settings.DEFAULT_GAIN
-            if gain:
-                moondrop.set_gain(gain)
-                logging.info(f"Applied saved gain: {gain}")
-            
-            # Apply filter
-            filter_type = self.config.default_settings.DEFAULT_FILTER
-            if filter_type:
-                moondrop.set_filter(filter_type)
-                logging.info(f"Applied saved filter: {filter_type}")
-        except Exception as e:
-            logging.warning(f"Failed to apply some saved settings: {e}")
+            settings = presets.get_preset(self.config, name)
+        except ValueError as e:
+            show_error_dialog(str(e))
+            return
+        # The controls follow the writes through the state subscription
+        worker.submit(
+            self.moondrop.apply, settings,
+            callback=lambda result: self.on_preset_applied(name, result)
+        )
+
+    def on_preset_applied(self, name: str, result: ApplyResult) -> None:
+        """Report the outcome of applying a preset.
+
+        Args:
+            name: The preset name.
+            result: The outcome of the batch.
+        """
+        if result.ok:
+            logging.info("Applied preset %s (%d unchanged)", name, len(result.elided))
+        elif not self.moondrop.is_connected:
+            logging.warning("Device disconnected; preset %s not applied", name)
+        else:
+            show_error_dialog(f"Failed to apply {', '.join(result.failed())} from preset {name}")
+            logging.error("Failed to apply preset %s: %s", name, ', '.join(result.failed()))
+
+    def on_preset_save_clicked(self, button: Gtk.Button) -> None:
+        """Save the current control values as a named preset."""
+        dialog = Gtk.Dialog(title="Save Preset", transient_for=self, flags=0)
+        dialog.add_buttons(
+            Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL,
+            Gtk.STOCK_SAVE, Gtk.ResponseType.OK
+        )
+        entry = Gtk.Entry()
+        entry.set_text(self.preset.get_active_text() or "")
+        entry.set_activates_default(True)
+        dialog.set_default_response(Gtk.ResponseType.OK)
+        dialog.get_content_area().pack_start(entry, True, True, 0)
+        dialog.show_all()
+        response = dialog.run()
+        name = entry.get_text().strip()
+        dialog.destroy()
+        if response != Gtk.ResponseType.OK:
+            return
+
+        settings = {
+            'volume': int(self.slider.get_value()),
+            'gain': self.gain.get_active_text(),
+            'filter_type': self.filter.get_active_text(),
+            'led_status': self.led_toggle.get_active_text()
+        }
+        try:
+            self.save_config(lambda stored: presets.save_preset(stored, name, settings))
+        except (ValueError, OSError) as e:
+            show_error_dialog(f"Failed to save preset: {e}")
+            logging.error("Failed to save preset %s: %s", name, e)
+            return
+        self.fill_preset_selector(active=name)
+        logging.info("Preset %s saved", name)
+
+    def save_config(self, edit: Callable[[AppConfig], Any]) -> None:
+        """Apply an edit to the configuration file as it is now and save it.
+
+        The file is re-read first, so presets saved by the CLI or daemon
+        since the window opened are kept rather than overwritten. The saved
+        settings and presets are then taken over by the window. The write
+        itself is debounced, so several saves in quick succession reach the
+        disk once; it is flushed when the window closes.
+
+        Args:
+            edit: Called with the freshly loaded configuration to change it.
+
+        Raises:
+            ValueError: If the file is invalid JSON or the edit rejects a value.
+        """
+        stored = config_store.load()
+        edit(stored)
+        config_store.schedule_save(stored)
+        self.config.default_settings = stored.default_settings
+        self.config.presets = stored.presets
 
     def on_refresh_clicked(self, button: Optional[Gtk.Button]) -> None:
         """Handle the refresh button click event."""
-        # Get current device state
-        current_gain = moondrop.get_gain()
-        current_led = moondrop.get_current_led_status()
-        current_volume = moondrop.get_current_volume()
-        current_filter = moondrop.get_filter()
-        
-        # Update labels
-        if current_gain:
-            self.gain_label.set_text(f"Gain: {current_gain}")
-            # Sync combo box: "Low" = 0, "High" = 1
-            self.gain.set_active(0 if current_gain == "Low" else 1)
-        
-        if current_led:
-            self.led_toggle_label.set_text(f"LED Toggle: {current_led}")
-            # Sync combo box: "On" = 0, "Temporarily Off" = 1, "Off" = 2
-            led_map = {"On": 0, "Temporarily Off": 1, "Off": 2}
-            self.led_toggle.set_active(led_map.get(current_led, 0))
-        
-        if current_volume is not None:
-            self.slider.set_value(current_volume)
-        
-        if current_filter:
-            self.filter_label.set_text(f"Filter: {current_filter}")
-            # Sync combo box
-            filter_map = {
-                "Fast Roll-Off Low Latency": 0,
-                "Fast Roll-Off Phase Compensated": 1,
-                "Slow Roll-Off Low Latency": 2,
-                "Slow Roll-Off Phase Compensated": 3,
-                "Non-Oversampling": 4
-            }
-            self.filter.set_active(filter_map.get(current_filter, 0))
+        # Read the full device state in a single pass on the worker
+        worker.submit(self.moondrop.get_state, max_age=0, callback=self.update_from_state)
+
+    def update_from_state(self, state: Optional[DeviceState]) -> None:
+        """Sync labels and controls with a device state snapshot.
+
+        Controls are updated through their bindings, so no writes are sent.
+
+        Args:
+            state: The snapshot read from the device, or None if the read failed.
+        """
+        if state is None:
+            logging.error("Failed to read device state")
+            return
+        if state.gain:
+            self.gain_binding.update(state.gain)
+        if state.led_status:
+            self.led_binding.update(state.led_status)
+        if state.volume is not None:
+            self.volume_binding.update(state.volume)
+        if state.filter_type:
+            self.filter_binding.update(state.filter_type)
+
+    def on_device_changed(self, field: str, value: Any) -> bool:
+        """Show a setting that changed on the device.
+
+        Args:
+            field: The setting that changed.
+            value: Its new value.
+
+        Returns:
+            False so the idle source is removed.
+        """
+        if field == 'volume' and not self.volume_channel.idle():
+            # The slider is ahead of the device while a drag is being written
+            return False
+        bindings = {
+            'volume': self.volume_binding,
+            'gain': self.gain_binding,
+            'filter_type': self.filter_binding,
+            'led_status': self.led_binding
+        }
+        if value is not None and field in bindings:
+            bindings[field].update(value)
+        return False
+
+    def on_connection_changed(self, connected: bool) -> bool:
+        """Disable controls while the device is unplugged and resync on return.
+
+        Args:
+            connected: Whether the device is now attached.
+
+        Returns:
+            False so the idle source is removed.
+        """
+        # Before the first state arrives on_first_state decides instead
+        self.vbox.set_sensitive(connected and self.has_state)
+        if connected and self.has_state:
+            self.on_refresh_clicked(None)
+        return False
 
     def on_save_clicked(self, button: Gtk.Button) -> None:
         """Handle the save settings button click event."""
@@ -325,15 +612,15 @@ class ModernGUI(Gtk.Window):
                 logging.error("Attempted to save with None values")
                 return
             
-            # Update config
-            self.config.default_settings.DEFAULT_VOLUME = volume
-            self.config.default_settings.DEFAULT_LED_STATUS = led_status
-            self.config.default_settings.DEFAULT_GAIN = gain
-            self.config.default_settings.DEFAULT_FILTER = filter_type
-            
-            # Save to file
-            config_path = os.path.expanduser('~/.config/dawnpro/config.json')
-            self.config.save_to_file(config_path)
+            def update(stored: AppConfig) -> None:
+                stored.default_settings.DEFAULT_VOLUME = volume
+                stored.default_settings.DEFAULT_LED_STATUS = led_status
+                stored.default_settings.DEFAULT_GAIN = gain
+                stored.default_settings.DEFAULT_FILTER = filter_type
+
+            # Update the file and pick up presets saved elsewhere meanwhile
+            self.save_config(update)
+            self.fill_preset_selector(active=self.preset.get_active_text())
 
             show_success_dialog("Settings saved successfully!")
             logging.info("Settings saved to configuration file")
@@ -346,4 +633,14 @@ class ModernGUI(Gtk.Window):
 win = ModernGUI(config)
 win.connect("destroy", Gtk.main_quit)
 win.show_all()
+# Idle callbacks run after the first redraw, so this marks the window on screen
+GLib.idle_add(lambda: timeline.mark('window shown'))
 Gtk.main()
+config_store.flush()
+if win.moondrop is not None:
+    win.moondrop.close()
+worker.stop(timeout=2.0)
+if win.moondrop is not None and win.moondrop.metrics is not None:
+    win.moondrop.metrics.log_summary()
+if win.open_failed:
+    sys.exit(1)
@@ -0,0 +1,64 @@
+"""Circuit breaker accounting for retried transfers, against a simulated device."""
+import errno
+import os
+import sys
+import unittest
+from typing import Any
+import usb.core
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from device.capture import LIBUSB_ERROR_TIMEOUT  # noqa: E402
+from device.config import AppConfig  # noqa: E402
+from device.moondrop import Moondrop  # noqa: E402
+from device.simulator import SimulatedDawnPro  # noqa: E402
+
+
+class RetriedCommandTest(unittest.TestCase):
+    def setUp(self) -> None:
+        config = AppConfig()
+        config.transport.MIN_TRANSFER_GAP = 0.0
+        config.transport.PRESENCE_CHECK_INTERVAL = 0.0
+        config.transport.RETRY_ATTEMPTS = 2
+        config.transport.RETRY_BACKOFF = 0.0
+        config.transport.BREAKER_THRESHOLD = 3
+        self.device = SimulatedDawnPro(config)
+        self.moondrop = Moondrop(config, usb_device=self.device, identifier='test')
+
+    def tearDown(self) -> None:
+        self.moondrop.close()
+
+    def test_failed_write_counts_once(self) -> None:
+        # Every attempt of one write fails: 1 try + 2 retries
+        self.device.fail_next(3)
+        self.assertFalse(self.moondrop.set_gain('High', force=True))
+        self.assertEqual(self.moondrop.breaker.stats()['failures'], 1)
+        self.assertFalse(self.moondrop.is_wedged)
+        self.assertTrue(self.moondrop.set_gain('High', force=True))
+
+    def test_failed_query_counts_once(self) -> None:
+        # Every reply fails, so the query is repeated as a pair twice more
+        replies = []
+        transfer = self.device.ctrl_transfer
+
+        def failing_replies(request_type: int, *args: Any) -> Any:
+            if request_type & 0x80:
+                replies.append(request_type)
+                raise usb.core.USBError("Operation timed out", LIBUSB_ERROR_TIMEOUT, errno.ETIMEDOUT)
+            return transfer(request_type, *args)
+
+        self.device.ctrl_transfer = failing_replies
+        self.assertIsNone(self.moondrop.get_current_volume())
+        self.assertEqual(len(replies), 3)
+        self.assertEqual(self.moondrop.breaker.stats()['failures'], 1)
+        self.assertFalse(self.moondrop.is_wedged)
+
+    def test_consecutive_failed_commands_open_breaker(self) -> None:
+        for _ in range(3):
+            self.device.fail_next(3)
+            self.assertFalse(self.moondrop.set_gain('High', force=True))
+        self.assertTrue(self.moondrop.is_wedged)
+
+
+if __name__ == '__main__':
+    unittest.main()
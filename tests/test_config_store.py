@@ -0,0 +1,49 @@
+"""Debounced saving through ConfigStore."""
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from device.config_store import ConfigStore  # noqa: E402
+
+
+class ScheduleSaveTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'config.json')
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_rapid_edits_write_once(self) -> None:
+        store = ConfigStore(self.path, autosave_delay=0.05)
+        config = store.load()
+        for volume in (10, 20, 30):
+            config.default_settings.DEFAULT_VOLUME = volume
+            store.schedule_save(config)
+        self.assertFalse(os.path.exists(self.path))
+        time.sleep(0.3)
+        self.assertEqual(store.stats()['writes'], 1)
+        self.assertEqual(ConfigStore(self.path).load().default_settings.DEFAULT_VOLUME, 30)
+
+    def test_load_sees_pending_save(self) -> None:
+        store = ConfigStore(self.path, autosave_delay=60)
+        config = store.load()
+        config.presets['quiet'] = {'volume': 5}
+        store.schedule_save(config)
+        reloaded = store.load()
+        reloaded.presets['loud'] = {'volume': 50}
+        store.schedule_save(reloaded)
+        self.assertTrue(store.flush())
+        self.assertEqual(store.stats()['writes'], 1)
+        self.assertEqual(sorted(ConfigStore(self.path).load().presets), ['loud', 'quiet'])
+
+    def test_flush_without_pending_save(self) -> None:
+        self.assertFalse(ConfigStore(self.path).flush())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+"""Presence checks of ConnectionManager."""
+import os
+import sys
+import unittest
+from typing import Any, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from device.connection import ConnectionManager  # noqa: E402
+from device.simulator import SimulatedDawnPro  # noqa: E402
+
+
+class PresenceCheckTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.device = SimulatedDawnPro()
+        self.scans = 0
+        self.connection = ConnectionManager(
+            self.find, lambda usb_device: None, probe=self.device.get_active_configuration
+        )
+
+    def find(self) -> Optional[Any]:
+        self.scans += 1
+        return self.device if self.device.attached else None
+
+    def test_attached_device_is_not_scanned_for(self) -> None:
+        self.assertTrue(self.connection._present())
+        self.assertEqual(self.scans, 0)
+
+    def test_failed_probe_falls_back_to_scan(self) -> None:
+        self.device.unplug()
+        self.assertFalse(self.connection._present())
+        self.assertEqual(self.scans, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()